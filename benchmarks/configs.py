@@ -0,0 +1,24 @@
+import json
+
+import pytest
+import toml
+import yaml
+
+# Keys per section of the generated configs.
+WIDTH = 100
+
+SIZES = [pytest.param(1000, id="1k"), pytest.param(100000, id="100k")]
+
+# Rounds of the load benchmarks; parsing 100k keys takes seconds.
+ROUNDS = {1000: 20, 100000: 3}
+
+WRITERS = {"json": json.dump, "yaml": yaml.safe_dump, "toml": toml.dump}
+
+
+def make_settings(size):
+    """Returns nested settings with `size` keys, in sections of `WIDTH`."""
+    settings = {}
+    for i in range(size):
+        section = settings.setdefault("section{0}".format(i // WIDTH), {})
+        section["key{0}".format(i % WIDTH)] = "value{0}".format(i)
+    return settings
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+import vyper
+
+from .configs import WRITERS, make_settings
+
+
+@pytest.fixture(scope="session")
+def config_file(tmp_path_factory):
+    """Returns a function writing, once per session, a config file of the
+    given type and size.
+    """
+    root = tmp_path_factory.mktemp("configs")
+    files = {}
+
+    def make(config_type, size):
+        path = root / "config{0}.{1}".format(size, config_type)
+        if path not in files:
+            with open(path, "w") as fp:
+                WRITERS[config_type](make_settings(size), fp)
+            files[path] = str(path)
+        return files[path]
+
+    return make
+
+
+@pytest.fixture
+def v():
+    """A Vyper instance with 1k keys in its config."""
+    v = vyper.Vyper()
+    v.set_config_type("json")
+    v.merge_config(json.dumps(make_settings(1000)))
+    yield v
+    v.remove_remote_providers()
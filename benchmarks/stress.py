@@ -0,0 +1,266 @@
+"""Concurrent read/reload stress test.
+
+Reader threads call `get` and `all_settings` while the file watcher and a
+remote listener reload the config continuously, then throughput, latency
+percentiles, and empty, torn or failed reads are reported:
+
+    python -m benchmarks.stress --readers 8 --duration 10
+
+Every reload writes the same generation number to all the keys of its
+layer, so a read mixing generations of one layer is torn. Threads dying
+from an exception, such as the file watcher reading a partly written
+file, are reported as crashed.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import vyper
+from vyper import remote
+
+LAYERS = ("file", "remote")
+
+
+def make_config(layer, keys, generation):
+    settings = {"key{0}".format(i): generation for i in range(keys)}
+    return {layer: settings}
+
+
+def percentile(values, p):
+    """Returns the p-th percentile of the sorted `values`."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Reader(threading.Thread):
+    def __init__(self, v, keys, stop, all_settings_every):
+        super(Reader, self).__init__()
+        self.daemon = True
+        self.v = v
+        self.keys = keys
+        self.stop = stop
+        self.all_settings_every = all_settings_every
+        self.latencies = []
+        self.empty = 0
+        self.torn = 0
+        self.errors = []
+
+    def _check(self, settings):
+        for layer in LAYERS:
+            values = settings.get(layer)
+            if not values:
+                self.empty += 1
+            elif len(set(values.values())) > 1:
+                self.torn += 1
+
+    def run(self):
+        n = 0
+        while not self.stop.is_set():
+            n += 1
+            start = time.perf_counter()
+            try:
+                if n % self.all_settings_every == 0:
+                    self._check(self.v.all_settings())
+                else:
+                    layer = LAYERS[n % len(LAYERS)]
+                    key = "{0}.key{1}".format(layer, n % self.keys)
+                    if self.v.get(key) is None:
+                        self.empty += 1
+            except Exception as e:
+                self.errors.append(repr(e))
+            self.latencies.append(time.perf_counter() - start)
+
+
+def _write_file(path, keys, stop, interval):
+    generation = 0
+    while not stop.is_set():
+        generation += 1
+        with open(path, "w") as fp:
+            json.dump(make_config("file", keys, generation), fp)
+        stop.wait(interval)
+
+
+def _put_remote(store, path, keys, stop, interval):
+    generation = 0
+    while not stop.is_set():
+        generation += 1
+        store.put(path, json.dumps(make_config("remote", keys, generation)))
+        stop.wait(interval)
+
+
+def run(
+    readers=4,
+    duration=5.0,
+    keys=100,
+    file_interval=0.05,
+    remote_interval=0.001,
+    all_settings_every=100,
+):
+    """Runs the stress test and returns its report as a `dict`."""
+    crashed = []
+    excepthook = threading.excepthook
+
+    def record_crash(args):
+        crashed.append("{0}: {1!r}".format(args.thread.name, args.exc_value))
+
+    threading.excepthook = record_crash
+    try:
+        report = _run(
+            readers,
+            duration,
+            keys,
+            file_interval,
+            remote_interval,
+            all_settings_every,
+        )
+    finally:
+        threading.excepthook = excepthook
+    report["crashed"] = crashed
+    return report
+
+
+def _run(readers, duration, keys, file_interval, remote_interval, all_settings_every):
+    root = tempfile.mkdtemp()
+    config_file = os.path.join(os.path.realpath(root), "config.json")
+    with open(config_file, "w") as fp:
+        json.dump(make_config("file", keys, 0), fp)
+
+    v = vyper.Vyper()
+    v.set_config_file(config_file)
+    v.set_config_type("json")
+    v.read_in_config()
+    v.watch_config()
+
+    store = remote.MemoryStore(
+        {"/config.json": json.dumps(make_config("remote", keys, 0))}
+    )
+    v.add_remote_provider("memory", store, "/config.json")
+    v.read_remote_config()
+    v.watch_remote_config()
+
+    stop = threading.Event()
+    threads = [Reader(v, keys, stop, all_settings_every) for _ in range(readers)]
+    threads.append(
+        threading.Thread(
+            target=_write_file, args=(config_file, keys, stop, file_interval)
+        )
+    )
+    threads.append(
+        threading.Thread(
+            target=_put_remote,
+            args=(store, "/config.json", keys, stop, remote_interval),
+        )
+    )
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    v.remove_remote_providers()
+    shutil.rmtree(root)
+
+    readers = threads[:readers]
+    latencies = sorted(lat for r in readers for lat in r.latencies)
+    errors = [e for r in readers for e in r.errors]
+    return {
+        "readers": len(readers),
+        "duration": elapsed,
+        "reads": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "latency": {
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+            "p99.9": percentile(latencies, 99.9),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "empty": sum(r.empty for r in readers),
+        "torn": sum(r.torn for r in readers),
+        "errors": errors,
+        "reloads": v.stats()["reloads"],
+    }
+
+
+def print_report(report):
+    print("readers:    {0}".format(report["readers"]))
+    print(
+        "reads:      {0} in {1:.2f}s, {2:.0f}/s".format(
+            report["reads"], report["duration"], report["throughput"]
+        )
+    )
+    print(
+        "latency:    "
+        + ", ".join(
+            "{0} {1:.1f}us".format(name, value * 1e6)
+            for name, value in report["latency"].items()
+        )
+    )
+    print(
+        "reloads:    "
+        + ", ".join(
+            "{0} {1}".format(source, count)
+            for source, count in sorted(report["reloads"].items())
+        )
+    )
+    print("empty:      {0}".format(report["empty"]))
+    print("torn:       {0}".format(report["torn"]))
+    print("errors:     {0}".format(len(report["errors"])))
+    for error in sorted(set(report["errors"]))[:10]:
+        print("  {0}".format(error))
+    print("crashed:    {0}".format(len(report["crashed"])))
+    for crash in report["crashed"]:
+        print("  {0}".format(crash))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.stress", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--readers", type=int, default=4, help="reader threads")
+    parser.add_argument(
+        "--duration", type=float, default=5.0, help="seconds to run for"
+    )
+    parser.add_argument("--keys", type=int, default=100, help="keys per layer")
+    parser.add_argument(
+        "--file-interval",
+        type=float,
+        default=0.05,
+        help="seconds between config file writes",
+    )
+    parser.add_argument(
+        "--remote-interval",
+        type=float,
+        default=0.001,
+        help="seconds between remote config updates",
+    )
+    parser.add_argument(
+        "--all-settings-every",
+        type=int,
+        default=100,
+        help="call all_settings instead of get every N reads",
+    )
+    args = parser.parse_args(argv)
+    report = run(
+        args.readers,
+        args.duration,
+        args.keys,
+        args.file_interval,
+        args.remote_interval,
+        args.all_settings_every,
+    )
+    print_report(report)
+    return 1 if report["errors"] or report["empty"] or report["crashed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+import dataclasses
+import json
+
+import pytest
+from vyper import remote
+
+
+def _set_override(v, monkeypatch):
+    v.set("hit", 1)
+
+
+def _set_args(v, monkeypatch):
+    v.bind_arg_value("hit", 1)
+
+
+def _set_env(v, monkeypatch):
+    monkeypatch.setenv("HIT", "1")
+    v.bind_env("hit")
+
+
+def _set_config(v, monkeypatch):
+    v.merge_config(json.dumps({"hit": 1}))
+
+
+def _set_kvstore(v, monkeypatch):
+    store = remote.MemoryStore({"/config.json": json.dumps({"hit": 1})})
+    v.add_remote_provider("memory", store, "/config.json")
+    v.read_remote_config()
+
+
+def _set_defaults(v, monkeypatch):
+    v.set_default("hit", 1)
+
+
+LAYERS = {
+    "override": _set_override,
+    "args": _set_args,
+    "env": _set_env,
+    "config": _set_config,
+    "kvstore": _set_kvstore,
+    "defaults": _set_defaults,
+}
+
+
+@pytest.mark.parametrize("layer", list(LAYERS))
+def test_get_hit(benchmark, v, monkeypatch, layer):
+    LAYERS[layer](v, monkeypatch)
+    assert benchmark(v.get, "hit") is not None
+
+
+def test_get_nested(benchmark, v):
+    assert benchmark(v.get, "section5.key42") == "value542"
+
+
+def test_get_nested_deep(benchmark, v):
+    v.merge_config(json.dumps({"a": {"b": {"c": {"d": {"e": {"f": 1}}}}}}))
+    assert benchmark(v.get, "a.b.c.d.e.f") == 1
+
+
+def test_get_miss(benchmark, v):
+    assert benchmark(v.get, "section5.missing") is None
+
+
+def test_get_automatic_env_hit(benchmark, v, monkeypatch):
+    monkeypatch.setenv("BENCH_PORT", "8080")
+    v.set_env_prefix("bench")
+    v.automatic_env()
+    assert benchmark(v.get, "port") == "8080"
+
+
+def test_get_automatic_env_fallthrough(benchmark, v):
+    v.set_env_prefix("bench")
+    v.automatic_env()
+    assert benchmark(v.get, "section5.key42") == "value542"
+
+
+def test_get_alias_chain(benchmark, v):
+    for i in range(5):
+        v.register_alias("alias{0}".format(i), "alias{0}".format(i + 1))
+    v.register_alias("alias5", "section5")
+    assert benchmark(v.get, "alias0") is not None
+
+
+def test_all_settings(benchmark, v):
+    assert len(benchmark(v.all_settings)) == 10
+
+
+def test_sub(benchmark, v):
+    assert benchmark(v.sub, "section5").get("key42") == "value542"
+
+
+def test_get_int_env(benchmark, v, monkeypatch):
+    monkeypatch.setenv("PORT", "8080")
+    v.bind_env("port")
+    assert benchmark(v.get_int, "port") == 8080
+
+
+def test_get_duration(benchmark, v):
+    v.set("timeout", "1h30m")
+    assert benchmark(v.get_duration, "timeout").seconds == 5400
+
+
+def test_unmarshal(benchmark, v):
+    section = dataclasses.make_dataclass(
+        "Section", [("key{0}".format(i), str) for i in range(100)]
+    )
+    config = dataclasses.make_dataclass(
+        "Config", [("section{0}".format(i), section) for i in range(10)]
+    )
+    assert benchmark(v.unmarshal, config).section5.key42 == "value542"
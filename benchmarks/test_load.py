@@ -0,0 +1,20 @@
+import json
+
+import pytest
+import vyper
+
+from .configs import ROUNDS, SIZES, make_settings
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("config_type", ["json", "yaml", "toml"])
+def test_read_in_config(benchmark, config_file, config_type, size):
+    v = vyper.Vyper()
+    v.set_config_file(config_file(config_type, size))
+    benchmark.pedantic(v.read_in_config, rounds=ROUNDS[size])
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_merge_config(benchmark, v, size):
+    data = json.dumps(make_settings(size))
+    benchmark.pedantic(v.merge_config, args=(data,), rounds=ROUNDS[size])
@@ -0,0 +1,9 @@
+from . import stress
+
+
+def test_stress():
+    report = stress.run(readers=2, duration=0.5)
+    assert report["reads"] > 0
+    assert report["reloads"]["remote"] > 1
+    assert [] == report["errors"]
+    assert 0 == report["empty"]
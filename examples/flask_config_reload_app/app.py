@@ -1,25 +1,33 @@
-from flask import Flask
+import contextlib
+
+from flask import Flask, g
 from vyper import v
 
 app = Flask(__name__)
 
-
-def update_config():
-    """Updates Flask's config."""
-    return app.config.update(v.all_settings(uppercase_keys=True))
-
-
 v.add_config_path(".")
 v.set_config_type("json")
 v.read_in_config()
-update_config()
 v.watch_config()
-v.on_config_change(update_config)
+
+
+@app.before_request
+def pin_config():
+    """Makes every `v.get` during the request read the same version of the
+    config, even if it's reloaded meanwhile.
+    """
+    g.config_pin = contextlib.ExitStack()
+    g.config_pin.enter_context(v.pin())
+
+
+@app.teardown_request
+def unpin_config(exc):
+    g.config_pin.close()
 
 
 @app.route("/")
 def hello():
-    return "Hello " + app.config["HELLO"]
+    return "Hello " + v.get_string("hello")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+import vyper.vyper as vv
+orig = vv.Vyper.__init__
+def init(self, *a, **k):
+    orig(self, *a, **k)
+    self.enable_persistent_layers()
+vv.Vyper.__init__ = init
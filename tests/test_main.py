@@ -0,0 +1,67 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import vyper
+from vyper import __main__ as cli
+
+yaml_example = """name: steve
+clothing:
+  jacket: leather
+  pants:
+    size: large
+age: 35
+"""
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.config = os.path.join(self.root, "config.yaml")
+        with open(self.config, "w") as fp:
+            fp.write(yaml_example)
+
+    def test_snapshot(self):
+        output = os.path.join(self.root, "config.snap")
+        cli.main(["snapshot", self.config, output])
+
+        v = vyper.Vyper.load_snapshot(output)
+        self.assertEqual("steve", v.get("name"))
+        self.assertEqual("large", v.get("clothing.pants.size"))
+
+    def _run(self, *argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            cli.main(list(argv))
+        return out.getvalue()
+
+    def test_dump(self):
+        out = self._run("dump", self.config)
+        self.assertEqual(
+            [
+                "age = 35",
+                'clothing.jacket = "leather"',
+                'clothing.pants.size = "large"',
+                'name = "steve"',
+            ],
+            out.splitlines(),
+        )
+
+    def test_explain(self):
+        out = self._run("explain", self.config, "clothing.pants.size")
+        self.assertIn('value:  "large"', out)
+        self.assertIn("source: config", out)
+
+        out = self._run("explain", self.config, "clothing.gloves")
+        self.assertIn("source: not set", out)
+
+    def test_bench(self):
+        out = self._run("bench", self.config, "-n", "100")
+        self.assertEqual(
+            ["get", "get (nested)", "all_settings", "read_in_config"],
+            [line[:16].strip() for line in out.splitlines()],
+        )
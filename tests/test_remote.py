@@ -0,0 +1,288 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import vyper
+from distconfig.backends.base import BaseBackend
+from vyper import constants, errors, remote
+
+
+class StaticBackend(BaseBackend):
+    def __init__(self, client, **kwargs):
+        super(StaticBackend, self).__init__(**kwargs)
+        self._client = client
+
+    def get_raw(self, path):
+        return self._client.get(path)
+
+
+class TestRemote(unittest.TestCase):
+    def setUp(self):
+        self.v = vyper.Vyper()
+        self.v.set_config_type("json")
+
+    def tearDown(self):
+        self.v.remove_remote_providers()
+
+    def test_unsupported_provider(self):
+        self.assertRaises(
+            errors.UnsupportedRemoteProviderError,
+            self.v.add_remote_provider,
+            "nope",
+            None,
+            "/config.json",
+        )
+
+    def test_memory_provider(self):
+        store = remote.MemoryStore({"/config.json": json.dumps({"hello": "world"})})
+        self.v.add_remote_provider("memory", store, "/config.json")
+        self.v.read_remote_config()
+        self.assertEqual("world", self.v.get("hello"))
+
+        self.v.watch_remote_config()
+        store.put("/config.json", json.dumps({"hello": "there"}))
+        self.assertEqual("there", self.v.get("hello"))
+
+    def test_memory_provider_ignores_other_paths(self):
+        store = remote.MemoryStore({"/a.json": json.dumps({"hello": "a"})})
+        self.v.add_remote_provider("memory", store, "/a.json")
+        self.v.read_remote_config()
+        self.v.watch_remote_config()
+
+        store.put("/b.json", json.dumps({"hello": "b"}))
+        self.assertEqual("a", self.v.get("hello"))
+
+    def test_provider_path_exists(self):
+        store = remote.MemoryStore()
+        self.v.add_remote_provider("memory", store, "/config.json")
+        self.v.add_remote_provider("memory", store, "/config.json")
+        self.assertEqual(1, len(self.v._remote_providers))
+
+    def test_file_provider(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with open(os.path.join(root, "config.json"), "w") as fp:
+            json.dump({"hello": "world"}, fp)
+
+        store = remote.FileStore(root, interval=0.01)
+        self.v.add_remote_provider("file", store, "config.json")
+        self.v.read_remote_config()
+        self.assertEqual("world", self.v.get("hello"))
+
+        self.v.watch_remote_config()
+        with open(os.path.join(root, "config.json"), "w") as fp:
+            json.dump({"hello": "there"}, fp)
+
+        deadline = time.time() + 2
+        while self.v.get("hello") != "there" and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual("there", self.v.get("hello"))
+
+    def test_register_provider(self):
+        self.addCleanup(remote.PROVIDER_TYPE.pop, "static")
+        self.addCleanup(remote.PROVIDER_HOST.pop, "static")
+        self.addCleanup(constants.SUPPORTED_REMOTE_PROVIDERS.remove, "static")
+
+        remote.register_provider("static", StaticBackend, host=lambda c: "static")
+        self.assertIn("static", constants.SUPPORTED_REMOTE_PROVIDERS)
+
+        client = {"/config.json": json.dumps({"hello": "static"})}
+        self.v.add_remote_provider("static", client, "/config.json")
+        self.v.read_remote_config()
+        self.assertEqual("static", self.v.get("hello"))
+
+    def test_lazy_fetch(self):
+        calls = []
+
+        class CountingStore(remote.MemoryStore):
+            def get(self, path):
+                calls.append(path)
+                return super(CountingStore, self).get(path)
+
+        store = CountingStore({"/config.json": json.dumps({"hello": "world"})})
+        self.v.add_remote_provider("memory", store, "/config.json", prefetch=False)
+        self.assertEqual([], calls)
+
+        self.v.read_remote_config()
+        self.assertEqual(["/config.json"], calls)
+        self.assertEqual("world", self.v.get("hello"))
+
+    def test_prefetch_does_not_block(self):
+        release = threading.Event()
+
+        class SlowStore(remote.MemoryStore):
+            def get(self, path):
+                release.wait(5)
+                return super(SlowStore, self).get(path)
+
+        store = SlowStore({"/config.json": json.dumps({"hello": "world"})})
+        self.v.add_remote_provider("memory", store, "/config.json")
+        self.assertFalse(self.v._remote_providers[0].prefetch().done())
+
+        release.set()
+        self.v.read_remote_config()
+        self.assertEqual("world", self.v.get("hello"))
+
+    def test_fetch_error_surfaces_on_read(self):
+        class BrokenStore(remote.MemoryStore):
+            def get(self, path):
+                raise IOError("unreachable")
+
+        store = BrokenStore()
+        self.v.add_remote_provider("memory", store, "/config.json")
+        self.assertRaises(errors.RemoteConfigError, self.v.read_remote_config)
+
+    def test_aread_remote_config(self):
+        class BrokenStore(remote.MemoryStore):
+            def get(self, path):
+                raise IOError("unreachable")
+
+        store = remote.MemoryStore({"/b.json": json.dumps({"hello": "b"})})
+        self.v.add_remote_provider("memory", BrokenStore(), "/a.json")
+        self.v.add_remote_provider("memory", store, "/b.json")
+
+        asyncio.run(self.v.aread_remote_config())
+        self.assertEqual("b", self.v.get("hello"))
+
+    def test_aread_remote_config_no_providers(self):
+        with self.assertRaises(errors.RemoteConfigError):
+            asyncio.run(self.v.aread_remote_config())
+
+    def test_changes(self):
+        store = remote.MemoryStore({"/config.json": json.dumps({"hello": "world"})})
+        self.v.add_remote_provider("memory", store, "/config.json")
+        self.v.read_remote_config()
+        self.v.watch_remote_config()
+
+        async def first_change():
+            changes = self.v.changes()
+            pending = asyncio.ensure_future(changes.__anext__())
+            await asyncio.sleep(0)
+            threading.Thread(
+                target=store.put,
+                args=("/config.json", json.dumps({"hello": "there"})),
+            ).start()
+            change = await asyncio.wait_for(pending, 5)
+            await changes.aclose()
+            return change
+
+        change = asyncio.run(first_change())
+        self.assertEqual(("remote", "/config.json"), tuple(change))
+        self.assertEqual("there", self.v.get("hello"))
+        self.assertEqual([], self.v._change_listeners)
+
+    def test_replicas_hedge_slow_replica(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        class SlowStore(remote.MemoryStore):
+            def get(self, path):
+                release.wait(5)
+                return super(SlowStore, self).get(path)
+
+        data = {"/config.json": json.dumps({"hello": "world"})}
+        self.v.add_remote_replicas(
+            "/config.json",
+            [("memory", SlowStore(data)), ("memory", remote.MemoryStore(data))],
+            hedge_after=0.01,
+        )
+        self.v.read_remote_config()
+        self.assertEqual("world", self.v.get("hello"))
+
+    def test_replicas_failover(self):
+        class BrokenStore(remote.MemoryStore):
+            def get(self, path):
+                raise IOError("unreachable")
+
+        store = remote.MemoryStore({"/config.json": json.dumps({"hello": "world"})})
+        self.v.add_remote_replicas(
+            "/config.json",
+            [("memory", BrokenStore()), ("memory", store)],
+            failure_threshold=1,
+        )
+        self.v.read_remote_config()
+        self.assertEqual("world", self.v.get("hello"))
+
+        rp = self.v._remote_providers[0]
+        self.assertTrue(rp.replicas[0].breaker.is_open)
+        self.assertEqual([rp.replicas[1]], rp._candidates())
+
+        self.v.watch_remote_config()
+        store.put("/config.json", json.dumps({"hello": "there"}))
+        self.assertEqual("there", self.v.get("hello"))
+
+    def test_replicas_all_failing(self):
+        class BrokenStore(remote.MemoryStore):
+            def get(self, path):
+                raise IOError("unreachable")
+
+        self.v.add_remote_replicas(
+            "/config.json", [("memory", BrokenStore()), ("memory", BrokenStore())]
+        )
+        self.assertRaises(errors.RemoteConfigError, self.v.read_remote_config)
+
+    def test_circuit_breaker(self):
+        breaker = remote.CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.05)
+        self.assertTrue(breaker.allow())  # trial call
+        self.assertFalse(breaker.allow())
+        breaker.success()
+        self.assertTrue(breaker.allow())
+
+    def test_pooled_source(self):
+        calls = []
+
+        class CountingStore(remote.MemoryStore):
+            def get(self, path):
+                calls.append(path)
+                return super(CountingStore, self).get(path)
+
+        store = CountingStore({"/config.json": json.dumps({"hello": "world"})})
+        other = vyper.Vyper()
+        other.set_config_type("json")
+        self.addCleanup(other.remove_remote_providers)
+        sources = len(remote.pool)
+
+        for v in (self.v, other):
+            v.add_remote_provider("memory", store, "/config.json")
+            v.read_remote_config()
+            v.watch_remote_config()
+
+        self.assertEqual(sources + 1, len(remote.pool))
+        self.assertIs(
+            self.v._remote_providers[0].proxy, other._remote_providers[0].proxy
+        )
+        self.assertEqual(["/config.json"], calls)
+
+        store.put("/config.json", json.dumps({"hello": "there"}))
+        self.assertEqual("there", self.v.get("hello"))
+        self.assertEqual("there", other.get("hello"))
+
+        other.remove_remote_providers()
+        self.assertEqual(sources + 1, len(remote.pool))
+        self.v.remove_remote_providers()
+        self.assertEqual(sources, len(remote.pool))
+
+    def test_schema_rejects_update(self):
+        store = remote.MemoryStore({"/config.json": json.dumps({"port": 8080})})
+        self.v.set_schema({"port": {"type": int, "max": 65535}})
+        self.v.add_remote_provider("memory", store, "/config.json")
+        self.v.read_remote_config()
+        self.v.watch_remote_config()
+
+        with self.assertLogs("vyper.remote", "ERROR"):
+            store.put("/config.json", json.dumps({"port": 80800}))
+        self.assertEqual(8080, self.v.get("port"))
+
+        store.put("/config.json", json.dumps({"port": 8081}))
+        self.assertEqual(8081, self.v.get("port"))
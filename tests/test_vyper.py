@@ -1,14 +1,20 @@
 import argparse
+import asyncio
+import dataclasses
+import datetime
 import json
 import os
+import shutil
 import tempfile
+import threading
+import typing
 import unittest
 
 import toml
 import vyper
 import yaml
 from builtins import str as text
-from vyper import errors
+from vyper import errors, metrics, remote, watch
 
 try:
     FileNotFoundError
@@ -98,6 +104,32 @@ json_camel_case_example = {
 }
 
 
+@dataclasses.dataclass(frozen=True)
+class Pants:
+    size: str
+    pockets: int = 4
+
+
+@dataclasses.dataclass(frozen=True)
+class Clothing:
+    jacket: str
+    pants: Pants
+    hats: typing.List[str] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class Person:
+    name: str
+    age: int
+    clothing: Clothing
+    beard: bool
+    nickname: typing.Optional[str] = None
+    hobbies: typing.List[str] = dataclasses.field(default_factory=list)
+    timeout: datetime.timedelta = dataclasses.field(
+        default=datetime.timedelta(seconds=30), metadata={"vyper": "http.timeout"}
+    )
+
+
 class TestVyper(unittest.TestCase):
     def setUp(self):
         self.v = vyper.Vyper()
@@ -106,30 +138,30 @@ class TestVyper(unittest.TestCase):
     def _init_configs(self):
         self.v.set_config_type("yaml")
         r = yaml.safe_dump(text(yaml_example))
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
 
         self.v.set_config_type("json")
         r = json.dumps(json_example)
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
 
         self.v.set_config_type("toml")
         r = toml.loads(toml_example)
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
 
     def _init_yaml(self):
         self.v.set_config_type("yaml")
         r = yaml.safe_dump(yaml_example)
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
 
     def _init_json(self, fixture=None):
         self.v.set_config_type("json")
         r = json.dumps(fixture or json_example)
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
 
     def _init_toml(self):
         self.v.set_config_type("toml")
         r = toml.loads(toml_example)
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
 
     def _init_dirs(self):
         test_dirs = ["a a", "b", "D_"]
@@ -170,7 +202,7 @@ class TestVyper(unittest.TestCase):
     def test_unmarshalling(self):
         self.v.set_config_type("yaml")
         r = yaml.safe_dump(yaml_example)
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
         self.assertTrue(self.v.in_config("name"))
         self.assertFalse(self.v.in_config("state"))
         self.assertEqual("steve", self.v.get("name"))
@@ -179,7 +211,7 @@ class TestVyper(unittest.TestCase):
     def test_yaml_duplication_nested(self):
         self.v.set_config_type("yaml")
         r = yaml.safe_dump(yaml_duplicate_in_nested)
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
         self.assertEqual("yeap", self.v.get("sweet.home.alabama"))
         self.assertEqual("noway", self.v.get("sweet.job.alabama"))
 
@@ -242,7 +274,7 @@ class TestVyper(unittest.TestCase):
         # Yaml config
         self.v.set_config_type("yaml")
         r = yaml.safe_dump("yaml_param: from_yaml")
-        self.v._unmarshall_reader(r, self.v._config)
+        self.v.read_config(r)
 
         # Overrides
         self.v.set("overrides_param", "from_overrides")
@@ -443,6 +475,67 @@ class TestVyper(unittest.TestCase):
         self.v.set("helloworld", "fubar")
         self.assertTrue(self.v.is_set("helloworld"))
 
+    def test_is_set_index(self):
+        self._init_yaml()
+        self.assertTrue(self.v.is_set("clothing"))
+        self.assertTrue(self.v.is_set("Clothing.Pants.Size"))
+        self.assertFalse(self.v.is_set("clothing.pants.color"))
+
+        self.v.set("clothing.pants.color", "blue")
+        self.assertTrue(self.v.is_set("clothing.pants.color"))
+        self.v.set("clothing.pants.color", None)
+        self.assertFalse(self.v.is_set("clothing.pants.color"))
+
+        self.v.register_alias("wear", "clothing")
+        self.assertTrue(self.v.is_set("wear.jacket"))
+
+        # a scalar in a higher layer shadows the nested values
+        self.v.set("clothing", "none")
+        self.assertFalse(self.v.is_set("clothing.jacket"))
+
+        self.assertFalse(self.v.is_set("shoes.size"))
+        os.environ["SHOES_SIZE"] = "42"
+        self.addCleanup(os.environ.pop, "SHOES_SIZE")
+        self.v.bind_env("shoes.size", "SHOES_SIZE")
+        self.assertTrue(self.v.is_set("shoes.size"))
+
+    def test_keys_with_prefix(self):
+        self._init_yaml()
+        self.v.set_default("clothing.gloves", "wool")
+        self.assertEqual(
+            [
+                "clothing.gloves",
+                "clothing.jacket",
+                "clothing.pants.size",
+                "clothing.trousers",
+            ],
+            self.v.keys_with_prefix("Clothing."),
+        )
+
+        self.v.merge_config(yaml.safe_dump("clothing: {pants: {color: blue}}"))
+        self.assertEqual(
+            ["clothing.pants.color", "clothing.pants.size"],
+            self.v.keys_with_prefix("clothing.pants."),
+        )
+        self.assertEqual([], self.v.keys_with_prefix("shoes"))
+
+    def test_all_keys_nested(self):
+        self._init_yaml()
+        self.v.set("id", 1)
+        self.v.bind_env("shoes.size", "SHOES_SIZE")
+        keys = self.v.all_keys(nested=True)
+        self.assertEqual(sorted(keys), keys)
+        self.assertIn("clothing.pants.size", keys)
+        self.assertIn("id", keys)
+        self.assertIn("shoes.size", keys)
+        self.assertNotIn("clothing", keys)
+        self.assertIn("CLOTHING.JACKET", self.v.all_keys(True, nested=True))
+
+        with self.v.pin() as view:
+            self.v.set("clothing.gloves", "wool")
+            self.assertNotIn("clothing.gloves", view.all_keys(nested=True))
+            self.assertIn("clothing.gloves", self.v.all_keys(nested=True))
+
     def test_dirs_search(self):
         root, config, cleanup = self._init_dirs()
 
@@ -463,6 +556,21 @@ class TestVyper(unittest.TestCase):
         finally:
             cleanup()
 
+    def test_aread_in_config(self):
+        root, config, cleanup = self._init_dirs()
+
+        try:
+            v = vyper.Vyper()
+            v.set_config_name(config)
+            v.set_config_type("toml")
+            v.add_config_path("b")
+
+            asyncio.run(v.aread_in_config())
+
+            self.assertEqual("value is b", v.get_string("key"))
+        finally:
+            cleanup()
+
     def test_wrong_dirs_search_not_found(self):
         _, config, cleanup = self._init_dirs()
 
@@ -526,6 +634,27 @@ class TestVyper(unittest.TestCase):
         subv = self.v.sub("clothing.pants.size")
         self.assertEqual(subv, None)
 
+    def test_sub_view(self):
+        self.v.set_config_type("yaml")
+        self.v.read_config(yaml.safe_dump(text(yaml_example)))
+        self.v.set_default("clothing.gloves", "wool")
+        self.v.set("clothing.jacket", "denim")
+        os.environ["PANTS_SIZE"] = "small"
+        self.addCleanup(os.environ.pop, "PANTS_SIZE")
+        self.v.bind_env("clothing.pants.size", "PANTS_SIZE")
+
+        subv = self.v.sub("clothing")
+        self.assertEqual("denim", subv.get("jacket"))
+        self.assertEqual("wool", subv.get_string("gloves"))
+        self.assertEqual("small", subv.sub("pants").get("size"))
+        self.assertEqual(
+            {"jacket": "denim", "trousers": "denim", "gloves": "wool"},
+            {k: v for k, v in subv.all_settings().items() if k != "pants"},
+        )
+
+        self.v.merge_config(yaml.safe_dump({"clothing": {"hat": "beret"}}))
+        self.assertEqual("beret", subv.get("hat"))
+
     def test_unmarshalling_with_aliases(self):
         self.v.set_default("Id", 1)
         self.v.set("name", "Steve")
@@ -542,6 +671,144 @@ class TestVyper(unittest.TestCase):
         self.assertEqual(c.firstname, "Steve")
         self.assertEqual(c.surname, "Owen")
 
+    def test_unmarshal(self):
+        self._init_yaml()
+        os.environ["AGE"] = "36"
+        self.addCleanup(os.environ.pop, "AGE")
+        self.v.bind_env("age")
+        self.v.set("http.timeout", "1m")
+
+        p = self.v.unmarshal(Person)
+        self.assertEqual("steve", p.name)
+        self.assertEqual(36, p.age)
+        self.assertIs(True, p.beard)
+        self.assertIsNone(p.nickname)
+        self.assertEqual(["skateboarding", "snowboarding", "go"], p.hobbies)
+        self.assertEqual(datetime.timedelta(minutes=1), p.timeout)
+        self.assertEqual(Clothing("leather", Pants("large")), p.clothing)
+        self.assertEqual(Pants("large"), self.v.unmarshal(Pants, "clothing.pants"))
+
+        self.v.set("clothing.pants.size", "small")
+        self.assertEqual("small", self.v.unmarshal(Person).clothing.pants.size)
+
+    def test_unmarshal_errors(self):
+        self.v.set("size", "large")
+        self.v.set("pockets", "many")
+        with self.assertRaises(errors.UnmarshalError):
+            self.v.unmarshal(Pants)
+        with self.assertRaises(errors.UnmarshalError):
+            self.v.unmarshal(Clothing)
+        with self.assertRaises(errors.UnmarshalError):
+            self.v.unmarshal(dict)
+
+    def test_schema(self):
+        self.v.set_config_type("json")
+        self.v.set_schema(
+            {
+                "port": {"type": int, "required": True, "min": 1, "max": 65535},
+                "env": {"choices": ["dev", "prod"]},
+                "timeout": datetime.timedelta,
+                "hosts": {"type": typing.List[str], "min": 1},
+            }
+        )
+        self.v.merge_config(json.dumps({"port": "8080", "env": "dev", "hosts": "a"}))
+        self.assertEqual(8080, self.v.get_int("port"))
+        self.assertEqual({"hits": 1, "misses": 0}, self._cache_stats())
+
+        version = self.v.version
+        for config in (
+            {"port": 0},
+            {"port": "http"},
+            {"env": "test"},
+            {"timeout": "soon"},
+            {"hosts": []},
+        ):
+            with self.assertRaises(errors.ValidationError):
+                self.v.merge_config(json.dumps(config))
+        self.assertEqual(version, self.v.version)
+        self.assertEqual("8080", self.v.get("port"))
+
+        v = vyper.Vyper()
+        v.set_schema({"port": {"type": int, "required": True}})
+        v.set_config_type("json")
+        with self.assertRaises(errors.ValidationError) as cm:
+            v.read_config(json.dumps({"host": "localhost"}))
+        self.assertEqual("Invalid Config port is required", str(cm.exception))
+        self.assertRaises(errors.ValidationError, v.validate)
+
+        self.assertRaises(ValueError, v.set_schema, {"port": {"kind": int}})
+
+    def test_watcher_keeps_config(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        config_file = os.path.join(root, "config.json")
+        with open(config_file, "w") as fp:
+            fp.write('{"port": 8080}')
+
+        self.v.set_config_file(config_file)
+        self.v.read_in_config()
+        self.v.set_schema({"port": int})
+        watcher = watch.BaseWatcher(config_file, self.v)
+
+        for config in ('{"port": ', '{"port": "http"}'):
+            with open(config_file, "w") as fp:
+                fp.write(config)
+            with self.assertLogs("vyper.watch", "ERROR"):
+                watcher.reload(0)
+            self.assertEqual(8080, self.v.get("port"))
+
+    def test_interpolation(self):
+        os.environ["DB_NAME"] = "app"
+        self.addCleanup(os.environ.pop, "DB_NAME")
+        self.v.set_config_type("json")
+        self.v.merge_config(
+            json.dumps(
+                {
+                    "db": {
+                        "host": "localhost",
+                        "port": 5432,
+                        "url": "postgres://${db.host}:${db.port}/${env:DB_NAME}",
+                    },
+                    "port": "${DB.PORT}",
+                    "literal": "$${db.host}",
+                    "missing": "${nope}",
+                }
+            )
+        )
+        self.v.enable_interpolation()
+
+        self.assertEqual("postgres://localhost:5432/app", self.v.get("db.url"))
+        self.assertEqual(5432, self.v.get_int("port"))
+        self.assertEqual(5432, self.v.get("port"))
+        self.assertEqual("${db.host}", self.v.get("literal"))
+        self.assertEqual("${nope}", self.v.get("missing"))
+        self.assertEqual("postgres://localhost:5432/app", self.v.get("db")["url"])
+
+        entries = self.v._interpolation.entries
+        literal = entries["literal"]
+        self.v.set("db.host", "remote")
+        self.assertIs(literal, self.v._interpolation.entries["literal"])
+        self.assertNotIn("db.url", self.v._interpolation.entries)
+        self.assertEqual("postgres://remote:5432/app", self.v.get("db.url"))
+
+        os.environ["DB_NAME"] = "test"
+        self.assertEqual("postgres://remote:5432/test", self.v.get("db.url"))
+
+    def test_interpolation_cycles(self):
+        self.v.set_config_type("json")
+        self.v.merge_config(json.dumps({"a": "${b}", "b": {"c": "x${a}"}}))
+        self.assertRaises(errors.InterpolationError, self.v.enable_interpolation)
+
+        v = vyper.Vyper()
+        v.set_config_type("json")
+        v.enable_interpolation()
+        v.merge_config(json.dumps({"a": "${b}"}))
+        version = v.version
+        with self.assertRaises(errors.InterpolationError):
+            v.merge_config(json.dumps({"b": "${a}"}))
+        self.assertEqual(version, v.version)
+        self.assertEqual("${b}", v.get("a"))
+
     def test_get_bool(self):
         self.v.set("mykey", "FALSE")
         self.assertEqual(self.v.get_bool("mykey"), False)
@@ -556,6 +823,76 @@ class TestVyper(unittest.TestCase):
         self.v.set("myfloatkey", 3.14159)
         self.assertEqual(self.v.get_bool("myfloatkey"), True)
 
+    def test_get_bytes(self):
+        self.v.set("mykey", "value")
+        self.assertEqual(b"value", self.v.get_bytes("mykey"))
+        self.assertEqual(b"", self.v.get_bytes("unset"))
+
+    def test_get_list(self):
+        os.environ["HOSTS"] = "a, b,,c"
+        self.addCleanup(os.environ.pop, "HOSTS")
+        self.v.bind_env("hosts")
+        self.v.set_default("ports", [80, 443])
+        self.v.set_default("port", 80)
+
+        self.assertEqual(["a", "b", "c"], self.v.get_string_list("hosts"))
+        self.assertEqual(["a, b", "c"], self.v.get_string_list("hosts", ",,"))
+        self.assertEqual(["80", "443"], self.v.get_string_list("ports"))
+        self.assertEqual([80, 443], self.v.get_list("ports"))
+        self.assertEqual([80], self.v.get_list("port"))
+        self.assertEqual([], self.v.get_list("unset"))
+
+    def test_get_duration(self):
+        self.v.set("timeout", "1h30m")
+        self.v.set("interval", "300ms")
+        self.v.set("delay", 2.5)
+        self.assertEqual(
+            datetime.timedelta(hours=1, minutes=30), self.v.get_duration("timeout")
+        )
+        self.assertEqual(
+            datetime.timedelta(milliseconds=300), self.v.get_duration("interval")
+        )
+        self.assertEqual(datetime.timedelta(seconds=2.5), self.v.get_duration("delay"))
+        self.assertEqual(datetime.timedelta(0), self.v.get_duration("unset"))
+
+        self.v.set("timeout", "1 hour")
+        self.assertRaises(ValueError, self.v.get_duration, "timeout")
+
+    def test_get_size(self):
+        self.v.set("buffer", "64MB")
+        self.v.set("page", "4k")
+        self.v.set("chunk", "1.5 GiB")
+        self.assertEqual(64 * 1024**2, self.v.get_size("buffer"))
+        self.assertEqual(4096, self.v.get_size("page"))
+        self.assertEqual(3 * 1024**3 // 2, self.v.get_size("chunk"))
+
+        self.v.set("buffer", "64 parsecs")
+        self.assertRaises(ValueError, self.v.get_size, "buffer")
+
+    def test_coerced_cache(self):
+        os.environ["HOSTS"] = "a,b"
+        self.addCleanup(os.environ.pop, "HOSTS")
+        self.v.bind_env("hosts")
+
+        hosts = self.v.get_string_list("hosts")
+        self.assertIs(hosts, self.v.get_string_list("hosts"))
+        self.assertEqual({"hits": 1, "misses": 1}, self._cache_stats())
+
+        os.environ["HOSTS"] = "a,b,c"
+        self.assertEqual(["a", "b", "c"], self.v.get_string_list("hosts"))
+
+        self.v.set("port", "8080")
+        self.assertEqual(8080, self.v.get_int("port"))
+        self.assertEqual("8080", self.v.get_string("port"))
+        self.v.set("port", 1)
+        self.assertEqual("1", self.v.get_string("port"))
+        self.v.set("port", True)
+        self.assertEqual("True", self.v.get_string("port"))
+
+    def _cache_stats(self):
+        stats = self.v.stats()["cache"]
+        return {"hits": stats["hits"], "misses": stats["misses"]}
+
     def test_merge_config(self):
         x = "a: abc"
         y = "b: xyz"
@@ -643,3 +980,239 @@ b:
         self.v.debug()
 
         self.assertEqual("raw", self.v.get("ingredients.batter.Regular.milk"))
+
+    def test_snapshot(self):
+        self._init_configs()
+        self.v.set_default("port", 8080)
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, "config.snap")
+        self.v.publish_snapshot(path)
+
+        v = vyper.Vyper()
+        v.attach_snapshot(path)
+        self.assertEqual("Cake", v.get("name"))
+        self.assertEqual("large", v.get("clothing.pants.size"))
+        self.assertEqual(self.v.get("clothing"), v.get("clothing"))
+        self.assertEqual(self.v.get("owner.dob"), v.get("owner.dob"))
+        self.assertEqual("MongoDB", v.get("Owner.Organization"))
+        self.assertEqual(8080, v.get_int("port"))
+        self.assertIsNone(v.get("clothing.gloves"))
+        self.assertSetEqual(set(self.v.all_keys()), set(v.all_keys()))
+
+        v.set_default("port", 9090)
+        self.assertEqual(8080, v.get("port"))
+        v.set("port", 9090)
+        self.assertEqual(9090, v.get("port"))
+
+        subv = v.sub("clothing.pants")
+        self.assertEqual("large", subv.get("size"))
+
+    def test_snapshot_generation(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, "config.snap")
+
+        self.v.set_config_type("json")
+        store = remote.MemoryStore({"/config.json": json.dumps({"hello": "world"})})
+        self.v.add_remote_provider("memory", store, "/config.json")
+        self.addCleanup(self.v.remove_remote_providers)
+        self.v.read_remote_config()
+        self.v.watch_remote_config()
+        self.v.publish_snapshot(path, follow=True)
+
+        worker = vyper.Vyper()
+        worker.attach_snapshot(path)
+        self.assertEqual("world", worker.get("hello"))
+        self.assertEqual(1, worker._snapshot.generation)
+
+        store.put("/config.json", json.dumps({"hello": "there"}))
+        self.assertEqual("there", worker.get("hello"))
+        self.assertEqual(2, worker._snapshot.generation)
+
+    def test_dump_snapshot(self):
+        self._init_configs()
+        self.v.set_default("port", 8080)
+        self.v.set("name", "Steve")
+        self.v.register_alias("years", "age")
+        self.v.bind_env("id", "SNAPSHOT_ID")
+        self.v.set_env_prefix("snap")
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, "config.snap")
+        self.v.dump_snapshot(path)
+
+        v = vyper.Vyper.load_snapshot(path)
+        self.assertEqual("Steve", v.get("name"))
+        self.assertEqual(8080, v.get("port"))
+        self.assertEqual(35, v.get("years"))
+        self.assertEqual(self.v.get("owner.dob"), v.get("owner.dob"))
+        self.assertEqual(self.v.all_settings(), v.all_settings())
+        os.environ["SNAPSHOT_ID"] = "42"
+        self.assertEqual("42", v.get("id"))
+        self.assertEqual("snap", v._env_prefix)
+
+    def test_load_snapshot_invalid(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, "config.snap")
+        with open(path, "wb") as fp:
+            fp.write(b"not a snapshot")
+
+        self.assertRaises(errors.SnapshotError, vyper.Vyper.load_snapshot, path)
+
+    def test_explain(self):
+        self._init_yaml()
+        self.v.set_default("port", 8080)
+
+        t = self.v.explain("clothing.pants.size")
+        self.assertEqual("large", t.value)
+        self.assertEqual("config", t.source)
+
+        t = self.v.explain("port")
+        self.assertEqual(8080, t.value)
+        self.assertEqual("defaults", t.source)
+        self.assertEqual(
+            ["override", "args", "config", "kvstore", "defaults"],
+            [layer for layer, _ in t.lookups][:5],
+        )
+
+        t = self.v.explain("clothing.gloves")
+        self.assertIsNone(t.value)
+        self.assertIsNone(t.source)
+
+    def test_trace(self):
+        self._init_yaml()
+        self.v.automatic_env()
+        traces = []
+        self.v.trace(traces.append)
+
+        self.assertEqual("leather", self.v.get("clothing.jacket"))
+        self.assertEqual(1, len(traces))
+        t = traces[0]
+        self.assertEqual("clothing.jacket", t.key)
+        self.assertEqual("config", t.source)
+        self.assertEqual(len(t.lookups), t.probes)
+        self.assertEqual(3, t.getenv_calls)
+        self.assertGreater(t.elapsed, 0)
+
+        self.v.trace(None)
+        self.v.get("clothing.jacket")
+        self.assertEqual(1, len(traces))
+
+    def test_version(self):
+        version = self.v.version
+        self.v.set("name", "steve")
+        self.assertEqual(version + 1, self.v.version)
+
+        self.v.set_config_type("json")
+        self.v.merge_config(json.dumps({"age": 35}))
+        self.assertEqual(version + 2, self.v.version)
+
+    def test_copy_on_write(self):
+        self._init_json()
+        config = self.v._config
+        self.v.merge_config(json.dumps({"ppu": 1, "batters": {"size": 1}}))
+        self.assertEqual(0.55, config["ppu"])
+        self.assertNotIn("size", config["batters"])
+        self.assertIs(config["type"], self.v._config["type"])
+
+        os.environ["NAME"] = "Spike"
+        self.addCleanup(os.environ.pop, "NAME")
+        self.v.set_config_type("yaml")
+        self.v.merge_config(yaml.safe_dump({"clothing": {"jacket": "leather"}}))
+        self.v.bind_env("clothing.jacket", "NAME")
+        config = self.v._config
+        self.assertEqual({"jacket": "Spike"}, self.v.get("clothing"))
+        self.assertEqual("leather", config["clothing"]["jacket"])
+
+    def test_pin(self):
+        self.v.set("name", "steve")
+        other = []
+
+        with self.v.pin() as view:
+            self.v.set("name", "spike")
+            self.assertEqual("steve", self.v.get("name"))
+            self.assertEqual("steve", view.get_string("name"))
+            self.assertEqual({"name": "steve"}, self.v.all_settings())
+
+            with self.v.pin():
+                self.assertEqual("steve", self.v.get("name"))
+
+            t = threading.Thread(target=lambda: other.append(self.v.get("name")))
+            t.start()
+            t.join()
+
+        self.assertEqual(["spike"], other)
+        self.assertEqual("spike", self.v.get("name"))
+        self.assertEqual(0, self.v._pin_count)
+
+    def test_pin_tasks(self):
+        self.v.set("name", "steve")
+
+        async def pinned(started, reloaded):
+            with self.v.pin():
+                started.set()
+                await reloaded.wait()
+                return self.v.get("name")
+
+        async def main():
+            started, reloaded = asyncio.Event(), asyncio.Event()
+            task = asyncio.ensure_future(pinned(started, reloaded))
+            await started.wait()
+            self.v.set("name", "spike")
+            value = self.v.get("name")
+            reloaded.set()
+            return value, await task
+
+        self.assertEqual(("spike", "steve"), asyncio.run(main()))
+
+    def test_concurrent_writes(self):
+        stop = threading.Event()
+        errors = []
+
+        def read():
+            while not stop.is_set():
+                try:
+                    values = self.v.get_many(["a", "b"])
+                    if values["a"] != values["b"]:
+                        errors.append(values)
+                    self.v.all_settings()
+                except Exception as e:
+                    errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for t in readers:
+            t.start()
+        self.v.set_config_type("json")
+        for i in range(2000):
+            self.v.merge_config(json.dumps({"a": i, "b": i}))
+            self.v.set_default("key{0}".format(i), i)
+        stop.set()
+        for t in readers:
+            t.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(1999, self.v.get("b"))
+
+    def test_stats(self):
+        self.v.set_config_type("yaml")
+        self.v.merge_config(yaml.safe_dump(yaml_example))
+        self.v.get("clothing.jacket")
+        stats = self.v.stats()
+        self.assertEqual({}, stats["lookups"]["hits"])
+        self.assertEqual(1, stats["reloads"]["merge"])
+        self.assertEqual(1, stats["parse_duration"]["merge_config"]["count"])
+
+        self.v.enable_lookup_stats()
+        self.v.get("clothing.jacket")
+        self.v.get("clothing.gloves")
+        stats = self.v.stats()
+        self.assertEqual({"config": 1}, stats["lookups"]["hits"])
+        self.assertEqual(1, stats["lookups"]["misses"])
+
+        text = metrics.prometheus_text(self.v)
+        self.assertIn('vyper_lookups_total{layer="config"} 1\n', text)
+        self.assertIn('vyper_reloads_total{source="merge"} 1\n', text)
+        self.assertIn('vyper_parse_duration_seconds_count{op="merge_config"} 1\n', text)
+        self.assertIn('vyper_watch_lag_seconds_bucket{le="+Inf"} 0\n', text)
@@ -0,0 +1,133 @@
+import argparse
+import json
+import logging
+import sys
+import timeit
+
+from . import util
+from .vyper import Vyper
+
+
+def _load(args):
+    v = Vyper()
+    v.set_config_file(args.config)
+    if args.type:
+        v.set_config_type(args.type)
+    if args.env_prefix:
+        v.set_env_prefix(args.env_prefix)
+    if args.automatic_env:
+        v.automatic_env()
+    v.read_in_config()
+    return v
+
+
+def snapshot(args):
+    """Precompiles a config file into a snapshot for `Vyper.load_snapshot`."""
+    v = _load(args)
+    v.dump_snapshot(args.output)
+
+
+def _format(val):
+    return json.dumps(val, default=str)
+
+
+def dump(args):
+    """Prints the resolved configuration as flattened keys."""
+    v = _load(args)
+    settings = util.flatten_dict(v.all_settings(), v._key_delimiter)
+    for key in sorted(settings):
+        print("{0} = {1}".format(key, _format(settings[key])))
+
+
+def explain(args):
+    """Shows which layer a key's value comes from and the lookups made."""
+    v = _load(args)
+    t = v.explain(args.key)
+    print("key:    {0}".format(t.key))
+    print("value:  {0}".format(_format(t.value)))
+    print("source: {0}".format(t.source or "not set"))
+    print("lookups:")
+    for layer, key in t.lookups:
+        print("  {0:<9} {1}".format(layer, key))
+
+
+def _time(name, func, number):
+    total = timeit.timeit(func, number=number)
+    print(
+        "{0:<16} {1:>8} calls {2:>12.3f} us/call".format(
+            name, number, total / number * 1e6
+        )
+    )
+
+
+def bench(args):
+    """Times `get`, nested `get`, `all_settings` and `read_in_config`."""
+    v = _load(args)
+    settings = util.flatten_dict(v.all_settings(), v._key_delimiter)
+    top = next(iter(v.all_keys()), "")
+    nested = max(settings, key=lambda k: k.count(v._key_delimiter), default="")
+
+    _time("get", lambda: v.get(top), args.number)
+    _time("get (nested)", lambda: v.get(nested), args.number)
+    _time("all_settings", v.all_settings, max(1, args.number // 100))
+    _time("read_in_config", v.read_in_config, max(1, args.number // 100))
+
+
+def _add_config_arguments(parser):
+    parser.add_argument("config", help="path of the config file")
+    parser.add_argument(
+        "--type", help="config type, when not given by the file extension"
+    )
+    parser.add_argument("--env-prefix", help="prefix of the env. variables")
+    parser.add_argument(
+        "--automatic-env",
+        action="store_true",
+        help="read values from env. variables as well",
+    )
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m vyper", description="Vyper configuration tools"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    p = commands.add_parser("snapshot", help=snapshot.__doc__)
+    _add_config_arguments(p)
+    p.add_argument("output", help="path of the snapshot to write")
+    p.set_defaults(func=snapshot)
+
+    p = commands.add_parser("dump", help=dump.__doc__)
+    _add_config_arguments(p)
+    p.set_defaults(func=dump)
+
+    p = commands.add_parser("explain", help=explain.__doc__)
+    _add_config_arguments(p)
+    p.add_argument("key", help="key to explain, e.g. datastore.metric.host")
+    p.set_defaults(func=explain)
+
+    p = commands.add_parser("bench", help=bench.__doc__)
+    _add_config_arguments(p)
+    p.add_argument(
+        "-n",
+        "--number",
+        type=int,
+        default=10000,
+        help="calls to `get` (default %(default)s), "
+        "a hundredth of that to the others",
+    )
+    p.set_defaults(func=bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,4 +2,4 @@
 SUPPORTED_EXTENSIONS = ["json", "toml", "yaml", "yml"]
 
 # Universally supported remote providers.
-SUPPORTED_REMOTE_PROVIDERS = ["etcd", "consul", "zookeeper"]
+SUPPORTED_REMOTE_PROVIDERS = ["etcd", "consul", "zookeeper", "memory", "file"]
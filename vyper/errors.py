@@ -36,7 +36,7 @@ class UnsupportedConfigError(Exception):
 
 class UnsupportedRemoteProviderError(Exception):
     """Denotes encountering an unsupported remote provider.
-    Currently only etcd, consul and zookeeper are supported.
+    See `vyper.remote.register_provider` to add support for a new one.
     """
 
     def __init__(self, message, *args):
@@ -45,3 +45,51 @@ class UnsupportedRemoteProviderError(Exception):
 
     def __str__(self):
         return "Unsupported Remote Provider Type {0}".format(self.message)
+
+
+class SnapshotError(Exception):
+    """Denotes a missing, truncated or incompatible snapshot file."""
+
+    def __init__(self, message, *args):
+        self.message = message
+        super(SnapshotError, self).__init__(message, *args)
+
+    def __str__(self):
+        return "Invalid Snapshot {0}".format(self.message)
+
+
+class UnmarshalError(Exception):
+    """Denotes failing to build a dataclass from the configuration."""
+
+    def __init__(self, message, *args):
+        self.message = message
+        super(UnmarshalError, self).__init__(message, *args)
+
+    def __str__(self):
+        return "Unable to Unmarshal {0}".format(self.message)
+
+
+class ValidationError(Exception):
+    """Denotes a configuration not matching the schema set with
+    `Vyper.set_schema`.
+    """
+
+    def __init__(self, message, *args):
+        self.message = message
+        super(ValidationError, self).__init__(message, *args)
+
+    def __str__(self):
+        return "Invalid Config {0}".format(self.message)
+
+
+class InterpolationError(Exception):
+    """Denotes a cycle between `${key}` references, see
+    `Vyper.enable_interpolation`.
+    """
+
+    def __init__(self, message, *args):
+        self.message = message
+        super(InterpolationError, self).__init__(message, *args)
+
+    def __str__(self):
+        return "Interpolation Error {0}".format(self.message)
@@ -0,0 +1,98 @@
+import bisect
+import collections.abc
+import threading
+
+_MISSING = object()
+
+
+class KeyIndex(object):
+    """Lowercased, delimited paths of the values set in a group of nested
+    layers, kept up to date from the changes made to them.
+    Paths are reference counted, since several layers may set the same
+    one. Interior paths are indexed as well, so that a path which isn't
+    indexed is set in none of the layers. `None` values are not indexed,
+    as lookups skip them.
+    """
+
+    def __init__(self, delimiter="."):
+        self.delimiter = delimiter
+        # path -> number of values at it, nested dicts included
+        self._nodes = {}
+        # path -> number of values at it which aren't nested dicts
+        self._leaves = {}
+        # sorted leaves, or None when they changed since last sorted
+        self._sorted = []
+        self._lock = threading.Lock()
+
+    def __contains__(self, path):
+        return path in self._nodes
+
+    def __len__(self):
+        return len(self._leaves)
+
+    def update(self, a, b):
+        """Updates the index for the layer a being replaced by b.
+        Sub trees shared by both are skipped, so updating after a
+        copy-on-write change costs about the size of the change.
+        """
+        with self._lock:
+            self._update(a, b, "")
+
+    def keys(self):
+        """Returns the sorted leaf paths."""
+        keys = self._sorted
+        if keys is None:
+            with self._lock:
+                keys = self._sorted
+                if keys is None:
+                    keys = self._sorted = sorted(self._leaves)
+        return keys
+
+    def with_prefix(self, prefix):
+        """Returns the sorted leaf paths starting with prefix."""
+        keys = self.keys()
+        start = bisect.bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and keys[end].startswith(prefix):
+            end += 1
+        return keys[start:end]
+
+    def _path(self, prefix, k):
+        k = str(k).lower()
+        return prefix + self.delimiter + k if prefix else k
+
+    def _update(self, a, b, prefix):
+        if a is b:
+            return
+        for k in set(a) | set(b):
+            va = a.get(k, _MISSING)
+            vb = b.get(k, _MISSING)
+            if va is vb:
+                continue
+            path = self._path(prefix, k)
+            a_map = isinstance(va, collections.abc.Mapping) and va
+            b_map = isinstance(vb, collections.abc.Mapping) and vb
+            if a_map and b_map:
+                self._update(va, vb, path)
+            else:
+                self._add(path, va, -1)
+                self._add(path, vb, 1)
+
+    def _add(self, path, val, delta):
+        if val is _MISSING or val is None:
+            return
+        self._count(self._nodes, path, delta)
+        if isinstance(val, collections.abc.Mapping) and val:
+            for k, v in val.items():
+                self._add(self._path(path, k), v, delta)
+        elif self._count(self._leaves, path, delta):
+            self._sorted = None
+
+    def _count(self, counts, path, delta):
+        """Returns whether path was added to or removed from counts."""
+        count = counts.get(path, 0) + delta
+        if count:
+            counts[path] = count
+            return count == delta
+        del counts[path]
+        return True
@@ -0,0 +1,184 @@
+import collections.abc
+import os
+import re
+import threading
+
+from . import errors, util
+
+# A reference to a key, or to an env. variable with the "env:" prefix.
+# "$${" escapes a literal "${".
+_REF = re.compile(r"\$(\$?)\{([^}]*)\}")
+
+ENV_PREFIX = "env:"
+
+# An interpolated value, with the value it was interpolated from, the keys
+# it references, directly or not, and the env. variables it read.
+Entry = collections.namedtuple("Entry", ["raw", "value", "deps", "env"])
+
+_local = threading.local()
+
+
+def has_refs(val):
+    if isinstance(val, str):
+        return "${" in val
+    if isinstance(val, collections.abc.Mapping):
+        return any(has_refs(v) for v in val.values())
+    if isinstance(val, list):
+        return any(has_refs(v) for v in val)
+    return False
+
+
+def refs(s):
+    """Returns the references in the string s, env. variables included."""
+    return [m.group(2) for m in _REF.finditer(s) if not m.group(1)]
+
+
+class Memo(object):
+    """Interpolated values by key, with the reverse dependencies needed to
+    drop only the values affected by a change. Changes return a new
+    `Memo`, leaving this one to the views pinned before them.
+    """
+
+    def __init__(self, entries=None, dependents=None):
+        self.entries = entries if entries is not None else {}
+        # key -> keys whose values reference it
+        self.dependents = dependents if dependents is not None else {}
+
+    def get(self, key, raw):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.raw is not raw and (
+            type(entry.raw) is not type(raw) or entry.raw != raw
+        ):
+            return None
+        for var, val in entry.env.items():
+            if os.environ.get(var) != val:
+                return None
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        for dep in entry.deps:
+            self.dependents.setdefault(dep, set()).add(key)
+
+    def invalidate(self, changed, delimiter):
+        """Returns a `Memo` without the values depending on the changed
+        keys, or this one if none does.
+        """
+        stale = set()
+        pending = list(changed)
+        while pending:
+            path = pending.pop()
+            parts = path.split(delimiter)
+            for i in range(1, len(parts) + 1):
+                for key in self.dependents.get(delimiter.join(parts[:i]), ()):
+                    if key not in stale:
+                        stale.add(key)
+                        pending.append(key)
+
+        stale &= set(self.entries)
+        if not stale:
+            return self
+        entries = {k: e for k, e in self.entries.items() if k not in stale}
+        return Memo(entries, dict(self.dependents))
+
+
+def resolve(v, key, raw):
+    """Interpolates the references in raw, the value of key in v, and
+    returns an `Entry`.
+    """
+    resolving = getattr(_local, "resolving", None)
+    if resolving is None:
+        resolving = _local.resolving = []
+    if key in resolving:
+        cycle = resolving[resolving.index(key) :] + [key]
+        raise errors.InterpolationError(" -> ".join(cycle))
+
+    deps, env = set(), {}
+    resolving.append(key)
+    try:
+        value = _resolve(v, raw, deps, env)
+    finally:
+        resolving.pop()
+    return Entry(raw, value, frozenset(deps), env)
+
+
+def _resolve(v, val, deps, env):
+    if isinstance(val, str):
+        if "${" not in val:
+            return val
+        m = _REF.fullmatch(val)
+        if m is not None and not m.group(1):
+            # a lone reference keeps the type of the value
+            found = _lookup(v, m.group(2), deps, env)
+            return found if found is not None else val
+        return _REF.sub(lambda m: _replace(v, m, deps, env), val)
+    if isinstance(val, collections.abc.Mapping):
+        return {k: _resolve(v, x, deps, env) for k, x in val.items()}
+    if isinstance(val, list):
+        return [_resolve(v, x, deps, env) for x in val]
+    return val
+
+
+def _replace(v, m, deps, env):
+    if m.group(1):
+        return "${" + m.group(2) + "}"
+    found = _lookup(v, m.group(2), deps, env)
+    return str(found) if found is not None else m.group(0)
+
+
+def _lookup(v, ref, deps, env):
+    if ref.startswith(ENV_PREFIX):
+        var = ref[len(ENV_PREFIX) :]
+        env[var] = os.environ.get(var)
+        return env[var]
+
+    key = v._real_key(ref.lower())
+    deps.add(key)
+    found = v.get(ref)
+    entry = v._interpolation.entries.get(key)
+    if entry is not None:
+        deps.update(entry.deps)
+        env.update(entry.env)
+    return found
+
+
+def check_cycles(settings, delimiter):
+    """Raises `InterpolationError` if the references between the values
+    of the nested settings form a cycle.
+    """
+    flat = util.flatten_dict(settings, delimiter)
+    graph = {}
+    for path, val in flat.items():
+        if isinstance(val, str) and "${" in val:
+            graph[path.lower()] = [
+                r.lower() for r in refs(val) if not r.startswith(ENV_PREFIX)
+            ]
+
+    def targets(ref):
+        # the values under ref, or the value ref is under
+        prefix = ref + delimiter
+        return [
+            p
+            for p in graph
+            if p == ref or p.startswith(prefix) or ref.startswith(p + delimiter)
+        ]
+
+    done, stack = set(), []
+
+    def visit(path):
+        if path in stack:
+            cycle = stack[stack.index(path) :] + [path]
+            raise errors.InterpolationError(" -> ".join(cycle))
+        if path in done:
+            return
+        stack.append(path)
+        for ref in graph[path]:
+            for target in targets(ref):
+                visit(target)
+        stack.pop()
+        done.add(path)
+
+    for path in graph:
+        visit(path)
@@ -0,0 +1,170 @@
+import collections
+import threading
+
+# Upper bounds, in seconds, of the histogram buckets.
+BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    float("inf"),
+)
+
+
+class Histogram(object):
+    """Distribution of durations, in seconds, over `BUCKETS`."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for i, le in enumerate(self.buckets):
+                if value <= le:
+                    self.counts[i] += 1
+                    break
+            self.count += 1
+            self.sum += value
+
+    def as_dict(self):
+        """Returns the count, sum and cumulative count of each bucket."""
+        with self._lock:
+            cumulative, buckets = 0, []
+            for le, count in zip(self.buckets, self.counts):
+                cumulative += count
+                buckets.append((le, cumulative))
+            return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class Metrics(object):
+    """Counters and histograms of a `Vyper` instance, see `Vyper.stats`.
+    Per-layer lookup counts are only recorded once enabled with
+    `Vyper.enable_lookup_stats`, since they require tracing every `get`.
+    """
+
+    def __init__(self):
+        self.lookups = False
+        self.hits = collections.Counter()
+        self.misses = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.reloads = collections.Counter()
+        self.parse_duration = {
+            "read_in_config": Histogram(),
+            "merge_config": Histogram(),
+        }
+        self.remote_fetch_duration = Histogram()
+        self.watch_lag = Histogram()
+
+    def lookup(self, source):
+        if source is None:
+            self.misses += 1
+        else:
+            self.hits[source] += 1
+
+    def cache(self, hit):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    def as_dict(self):
+        cache_total = self.cache_hits + self.cache_misses
+        return {
+            "lookups": {
+                "enabled": self.lookups,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+            },
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_ratio": self.cache_hits / cache_total if cache_total else None,
+            },
+            "reloads": dict(self.reloads),
+            "parse_duration": {
+                op: h.as_dict() for op, h in self.parse_duration.items()
+            },
+            "remote_fetch_duration": self.remote_fetch_duration.as_dict(),
+            "watch_lag": self.watch_lag.as_dict(),
+        }
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join('{0}="{1}"'.format(k, v) for k, v in labels) + "}"
+
+
+def _histogram(lines, name, h, labels=()):
+    for le, count in h["buckets"]:
+        le = "+Inf" if le == float("inf") else repr(le)
+        lines.append(
+            "{0}_bucket{1} {2}".format(name, _labels(labels + (("le", le),)), count)
+        )
+    lines.append("{0}_sum{1} {2!r}".format(name, _labels(labels), h["sum"]))
+    lines.append("{0}_count{1} {2}".format(name, _labels(labels), h["count"]))
+
+
+def prometheus_text(v, prefix="vyper"):
+    """Returns the `stats` of Vyper instance v in the Prometheus text
+    exposition format.
+    """
+    stats = v.stats()
+    lines = []
+
+    name = prefix + "_lookups_total"
+    lines.append("# HELP {0} Lookups by layer the value was found in.".format(name))
+    lines.append("# TYPE {0} counter".format(name))
+    for layer, count in sorted(stats["lookups"]["hits"].items()):
+        lines.append("{0}{1} {2}".format(name, _labels((("layer", layer),)), count))
+    lines.append(
+        "{0}{1} {2}".format(
+            name, _labels((("layer", "none"),)), stats["lookups"]["misses"]
+        )
+    )
+
+    name = prefix + "_cache_lookups_total"
+    lines.append("# HELP {0} Value cache lookups.".format(name))
+    lines.append("# TYPE {0} counter".format(name))
+    for result, key in (("hit", "hits"), ("miss", "misses")):
+        lines.append(
+            "{0}{1} {2}".format(
+                name, _labels((("result", result),)), stats["cache"][key]
+            )
+        )
+
+    name = prefix + "_reloads_total"
+    lines.append("# HELP {0} Configuration reloads by source.".format(name))
+    lines.append("# TYPE {0} counter".format(name))
+    for source, count in sorted(stats["reloads"].items()):
+        lines.append("{0}{1} {2}".format(name, _labels((("source", source),)), count))
+
+    name = prefix + "_parse_duration_seconds"
+    lines.append("# HELP {0} Time spent reading and parsing config.".format(name))
+    lines.append("# TYPE {0} histogram".format(name))
+    for op, h in sorted(stats["parse_duration"].items()):
+        _histogram(lines, name, h, (("op", op),))
+
+    name = prefix + "_remote_fetch_duration_seconds"
+    lines.append("# HELP {0} Time spent fetching remote config.".format(name))
+    lines.append("# TYPE {0} histogram".format(name))
+    _histogram(lines, name, stats["remote_fetch_duration"])
+
+    name = prefix + "_watch_lag_seconds"
+    lines.append("# HELP {0} Delay from a file event to its reload.".format(name))
+    lines.append("# TYPE {0} histogram".format(name))
+    _histogram(lines, name, stats["watch_lag"])
+
+    return "\n".join(lines) + "\n"
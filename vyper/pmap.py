@@ -0,0 +1,280 @@
+import collections.abc
+
+# Bits of the hash consumed at each level of the trie.
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_HASH_MASK = (1 << _HASH_BITS) - 1
+
+_MISSING = object()
+
+
+def _hash(key):
+    return hash(key) & _HASH_MASK
+
+
+def _index(bitmap, bit):
+    return bin(bitmap & (bit - 1)).count("1")
+
+
+class _Node(object):
+    """Node of the trie: a bitmap of the 32 hash fragments in use at this
+    level, and for each, either a (hash, key, value) entry or a sub node.
+    """
+
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap, entries):
+        self.bitmap = bitmap
+        self.entries = entries
+
+    def find(self, shift, h, key):
+        bit = 1 << ((h >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return _MISSING
+        e = self.entries[_index(self.bitmap, bit)]
+        if isinstance(e, tuple):
+            if e[0] == h and (e[1] is key or e[1] == key):
+                return e[2]
+            return _MISSING
+        return e.find(shift + _BITS, h, key)
+
+    def assoc(self, shift, h, key, value):
+        """Returns the node with key set to value, and whether key was
+        added.
+        """
+        bit = 1 << ((h >> shift) & _MASK)
+        i = _index(self.bitmap, bit)
+        if not self.bitmap & bit:
+            entries = self.entries[:i] + ((h, key, value),) + self.entries[i:]
+            return _Node(self.bitmap | bit, entries), True
+
+        e = self.entries[i]
+        if isinstance(e, tuple):
+            if e[0] == h and (e[1] is key or e[1] == key):
+                if e[2] is value:
+                    return self, False
+                new, added = (h, key, value), False
+            else:
+                new, added = _pair(shift + _BITS, e, (h, key, value)), True
+        else:
+            new, added = e.assoc(shift + _BITS, h, key, value)
+            if new is e:
+                return self, False
+        return (
+            _Node(self.bitmap, self.entries[:i] + (new,) + self.entries[i + 1 :]),
+            added,
+        )
+
+    def dissoc(self, shift, h, key):
+        """Returns the node without key, this node if it doesn't hold key,
+        None if it ends up empty, or the single entry left, for the parent
+        to hold it instead.
+        """
+        bit = 1 << ((h >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return self
+        i = _index(self.bitmap, bit)
+        e = self.entries[i]
+        if isinstance(e, tuple):
+            if not (e[0] == h and (e[1] is key or e[1] == key)):
+                return self
+            new = None
+        else:
+            new = e.dissoc(shift + _BITS, h, key)
+            if new is e:
+                return self
+
+        if new is None:
+            bitmap = self.bitmap & ~bit
+            entries = self.entries[:i] + self.entries[i + 1 :]
+        else:
+            bitmap = self.bitmap
+            entries = self.entries[:i] + (new,) + self.entries[i + 1 :]
+        if not entries:
+            return None
+        if shift and len(entries) == 1 and isinstance(entries[0], tuple):
+            return entries[0]
+        return _Node(bitmap, entries)
+
+    def items(self):
+        for e in self.entries:
+            if isinstance(e, tuple):
+                yield e[1], e[2]
+            else:
+                yield from e.items()
+
+
+class _Collision(object):
+    """Entries whose keys have the same hash."""
+
+    __slots__ = ("h", "entries")
+
+    def __init__(self, h, entries):
+        self.h = h
+        self.entries = entries
+
+    def _position(self, key):
+        for i, e in enumerate(self.entries):
+            if e[1] is key or e[1] == key:
+                return i
+        return None
+
+    def find(self, shift, h, key):
+        i = self._position(key) if h == self.h else None
+        return self.entries[i][2] if i is not None else _MISSING
+
+    def assoc(self, shift, h, key, value):
+        if h != self.h:
+            # the other keys move down along with the new one
+            node = _Node(1 << ((self.h >> shift) & _MASK), (self,))
+            return node.assoc(shift, h, key, value)
+        i = self._position(key)
+        if i is None:
+            return _Collision(h, self.entries + ((h, key, value),)), True
+        if self.entries[i][2] is value:
+            return self, False
+        entries = self.entries[:i] + ((h, key, value),) + self.entries[i + 1 :]
+        return _Collision(h, entries), False
+
+    def dissoc(self, shift, h, key):
+        i = self._position(key) if h == self.h else None
+        if i is None:
+            return self
+        entries = self.entries[:i] + self.entries[i + 1 :]
+        if len(entries) == 1:
+            return entries[0]
+        return _Collision(h, entries)
+
+    def items(self):
+        for e in self.entries:
+            yield e[1], e[2]
+
+
+def _pair(shift, e1, e2):
+    """Returns a node holding the entries e1 and e2, whose keys differ."""
+    if e1[0] == e2[0]:
+        return _Collision(e1[0], (e1, e2))
+    b1 = (e1[0] >> shift) & _MASK
+    b2 = (e2[0] >> shift) & _MASK
+    if b1 == b2:
+        return _Node(1 << b1, (_pair(shift + _BITS, e1, e2),))
+    entries = (e1, e2) if b1 < b2 else (e2, e1)
+    return _Node((1 << b1) | (1 << b2), entries)
+
+
+_EMPTY_NODE = _Node(0, ())
+
+
+class _ItemsView(collections.abc.ItemsView):
+    def __iter__(self):
+        return self._mapping._root.items()
+
+
+class PMap(collections.abc.Mapping):
+    """Immutable mapping stored as a hash array mapped trie.
+    `set` and `delete` return a new `PMap` sharing all but the path to
+    the changed key with this one, so versions cost memory in proportion
+    to what changed between them and all stay readable.
+    """
+
+    __slots__ = ("_root", "_len")
+
+    def __init__(self, items=None):
+        self._root = _EMPTY_NODE
+        self._len = 0
+        if items is not None:
+            m = self.update(items)
+            self._root, self._len = m._root, m._len
+
+    @classmethod
+    def _make(cls, root, length):
+        m = cls.__new__(cls)
+        m._root = root
+        m._len = length
+        return m
+
+    def __getitem__(self, key):
+        val = self._root.find(0, _hash(key), key)
+        if val is _MISSING:
+            raise KeyError(key)
+        return val
+
+    def __contains__(self, key):
+        return self._root.find(0, _hash(key), key) is not _MISSING
+
+    def get(self, key, default=None):
+        val = self._root.find(0, _hash(key), key)
+        return default if val is _MISSING else val
+
+    def __iter__(self):
+        for k, _ in self._root.items():
+            yield k
+
+    def __len__(self):
+        return self._len
+
+    def items(self):
+        return _ItemsView(self)
+
+    def __repr__(self):
+        return "PMap({0!r})".format(dict(self._root.items()))
+
+    def __reduce__(self):
+        return PMap, (dict(self._root.items()),)
+
+    def set(self, key, value):
+        """Returns a copy with key set to value."""
+        root, added = self._root.assoc(0, _hash(key), key, value)
+        if root is self._root:
+            return self
+        return PMap._make(root, self._len + added)
+
+    def delete(self, key):
+        """Returns a copy without key."""
+        root = self._root.dissoc(0, _hash(key), key)
+        if root is self._root:
+            return self
+        if root is None:
+            root = _EMPTY_NODE
+        return PMap._make(root, self._len - 1)
+
+    def update(self, items):
+        """Returns a copy with the keys of the mapping items set."""
+        m = self
+        for k, v in dict(items).items():
+            m = m.set(k, v)
+        return m
+
+
+EMPTY = PMap()
+
+
+def evolve(old, new):
+    """Returns the nested mapping new as nested `PMap`s, sharing with
+    old, the previous version, the values which didn't change. Returns
+    old itself if nothing did.
+    """
+    if not isinstance(old, PMap):
+        old = EMPTY
+    result = old
+    for k in old:
+        if k not in new:
+            result = result.delete(k)
+    for k, v in new.items():
+        ov = old.get(k, _MISSING)
+        if ov is v:
+            continue
+        if isinstance(v, collections.abc.Mapping):
+            v = evolve(ov, v)
+        elif type(ov) is type(v) and ov == v:
+            continue
+        result = result.set(k, v)
+    return result
+
+
+def thaw(val):
+    """Returns the nested `PMap`s in val as `dict`s."""
+    if isinstance(val, PMap):
+        return {k: thaw(v) for k, v in val._root.items()}
+    return val
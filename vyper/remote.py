@@ -1,4 +1,15 @@
+import collections
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
 from distconfig import Proxy
+from distconfig.backends.base import BaseBackend
+from distconfig.backends.execution_context import ThreadingExecutionContext
 import toml
 import yaml
 
@@ -9,15 +20,158 @@ except ImportError:
 
 from . import constants, errors
 
+log = logging.getLogger("vyper.remote")
+
 PROVIDER_TYPE = {
     "consul": "distconfig.backends.consul.ConsulBackend",
     "etcd": "distconfig.backends.etcd.EtcdBackend",
     "zookeeper": "distconfig.backends.zookeeper.ZooKeeperBackend",
+    "memory": "vyper.remote.MemoryBackend",
+    "file": "vyper.remote.FileBackend",
 }
 
+PROVIDER_HOST = {
+    "consul": lambda c: "{0}://{1}:{2}".format(c.http.scheme, c.http.host, c.http.port),
+    "etcd": lambda c: "{0}://{1}:{2}".format(c.protocol, c.host, c.port),
+    "zookeeper": lambda c: ",".join(str("{0}:{1}".format(h[0], h[1])) for h in c.hosts),
+    "memory": lambda c: "memory://{0:x}".format(id(c)),
+    "file": lambda c: c.root,
+}
 
-class RemoteProvider(object):
-    def __init__(self, provider, client, path, v):
+
+def register_provider(name, backend, host=None):
+    """Registers a remote provider that can then be used with
+    `Vyper.add_remote_provider`.
+    backend is a distconfig `BaseBackend` subclass, or its dotted name,
+    which will be instantiated with the client given to
+    `add_remote_provider`.
+    host is an optional callable returning a description of the client's
+    endpoint, used for logging.
+    """
+    PROVIDER_TYPE[name] = backend
+    if host is not None:
+        PROVIDER_HOST[name] = host
+    if name not in constants.SUPPORTED_REMOTE_PROVIDERS:
+        constants.SUPPORTED_REMOTE_PROVIDERS.append(name)
+
+
+def provider_host(provider, client):
+    """Returns a description of the endpoint `client` points to."""
+    host = PROVIDER_HOST.get(provider)
+    if host is None:
+        return repr(client)
+    return host(client)
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(name="fetch"):
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = concurrent.futures.ThreadPoolExecutor(
+                thread_name_prefix="vyper-remote-{0}".format(name)
+            )
+    return executor
+
+
+def _configure(provider, client, parser):
+    backend = PROVIDER_TYPE.get(provider)
+    if isinstance(backend, str):
+        return Proxy.configure(backend, client=client, parser=parser)
+    return Proxy(backend(client=client, parser=parser))
+
+
+class SharedSource(object):
+    """A single proxy, fetch and watch on a remote path, shared by every
+    `RemoteProvider` reading that path. Changes are fanned out to all the
+    subscribed listeners.
+    """
+
+    def __init__(self, pool, key, proxy, path):
+        self.pool = pool
+        self.key = key
+        self.proxy = proxy
+        self.path = path
+        self.refs = 0
+        self._config = None
+        self._listeners = []
+        self._lock = threading.Lock()
+
+        self.proxy.backend.add_listener(self._dispatch)
+
+    def fetch(self):
+        """Returns the configuration, fetching it on the first call.
+        Concurrent callers wait for the same fetch.
+        """
+        with self._lock:
+            if self._config is None:
+                self._config = self.proxy.get_config(self.path, config_cls=RemoteConfig)
+            return self._config
+
+    def subscribe(self, cb):
+        self._listeners.append(cb)
+
+    def unsubscribe(self, cb):
+        self._listeners.remove(cb)
+
+    def _dispatch(self, data):
+        for cb in list(self._listeners):
+            cb(data)
+
+
+class ProviderPool(object):
+    """Process-wide registry of `SharedSource`, keyed by provider,
+    endpoint, path and config type.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sources)
+
+    def acquire(self, provider, client, path, config_type, parser):
+        key = (provider, provider_host(provider, client), path, config_type)
+        with self._lock:
+            source = self._sources.get(key)
+            if source is None:
+                proxy = _configure(provider, client, parser)
+                source = self._sources[key] = SharedSource(self, key, proxy, path)
+            source.refs += 1
+            return source
+
+    def release(self, source):
+        with self._lock:
+            source.refs -= 1
+            if source.refs <= 0 and self._sources.get(source.key) is source:
+                del self._sources[source.key]
+                source.proxy.backend.remove_listener(source._dispatch)
+
+
+pool = ProviderPool()
+
+
+class RemoteConfig(dict):
+    """Plain `dict` holding a remote configuration, kept up to date
+    through the backend listeners.
+    """
+
+    def _invalidate(self, new_data):
+        self.clear()
+        self.update(new_data)
+
+
+class BaseProvider(object):
+    """Lazily fetched remote configuration at `path`, feeding the
+    key/value store of `v`. Subclasses implement `_fetch` and
+    `add_listener`.
+    """
+
+    def __init__(self, path, v):
         self.v = v
         config_type = self.v._config_type
         if config_type != "" and config_type in constants.SUPPORTED_EXTENSIONS:
@@ -25,22 +179,49 @@ class RemoteProvider(object):
         else:
             raise errors.UnsupportedConfigError(config_type)
 
-        provider = PROVIDER_TYPE.get(provider)
-        self.proxy = Proxy.configure(provider, client=client, parser=self._get_parser())
+        self._path = path
 
-        self.config = self.proxy.get_config(path)
+        self._future = None
+        self._lock = threading.Lock()
 
     @property
-    def provider(self):
-        return self.provider
+    def path(self):
+        return self._path
 
     @property
-    def client(self):
-        return self.client
+    def config(self):
+        """The remote configuration, fetched on first access.
+        Raises `RemoteConfigError` if the fetch failed, in which case the
+        next access tries again.
+        """
+        future = self.prefetch()
+        try:
+            return future.result()
+        except Exception as e:
+            with self._lock:
+                if self._future is future:
+                    self._future = None
+            raise errors.RemoteConfigError("{0}: {1}".format(self, e))
 
-    @property
-    def path(self):
-        return self.path
+    def prefetch(self):
+        """Starts fetching the remote configuration in the background,
+        if not already started, and returns the matching future.
+        """
+        with self._lock:
+            if self._future is None:
+                self._future = _get_executor().submit(self._timed_fetch)
+            return self._future
+
+    def _timed_fetch(self):
+        start = time.perf_counter()
+        try:
+            return self._fetch()
+        finally:
+            duration = time.perf_counter() - start
+            self.v._metrics.remote_fetch_duration.observe(duration)
+
+    def _fetch(self):
+        raise NotImplementedError
 
     def _get_parser(self):
         if self.config_type == "json":
@@ -61,10 +242,360 @@ class RemoteProvider(object):
             return d
 
     def add_listener(self, cb=None):
-        if cb is not None:
-            self.proxy.backend.add_listener(cb)
-        else:
-            self.proxy.backend.add_listener(self._update_kvstore)
+        raise NotImplementedError
 
     def _update_kvstore(self, e):
-        self.v._kvstore = e
+        try:
+            self.v._publish(_kvstore=e)
+        except errors.ValidationError as err:
+            log.error("Rejected remote config {0}: {1}".format(self._path, err))
+            return
+        self.v._metrics.reloads["remote"] += 1
+        self.v._notify_change("remote", self._path)
+
+
+class RemoteProvider(BaseProvider):
+    def __init__(self, provider, client, path, v):
+        super(RemoteProvider, self).__init__(path, v)
+
+        self._provider = provider
+        self._client = client
+        self._listeners = []
+
+        self._source = pool.acquire(
+            provider, client, path, self.config_type, self._get_parser()
+        )
+        self.proxy = self._source.proxy
+
+    def __str__(self):
+        return "{0}:{1}".format(self._provider, self._path)
+
+    @property
+    def provider(self):
+        return self._provider
+
+    @property
+    def client(self):
+        return self._client
+
+    def _fetch(self):
+        return self._source.fetch()
+
+    def add_listener(self, cb=None):
+        cb = cb if cb is not None else self._update_kvstore
+        self._listeners.append(cb)
+        self._source.subscribe(cb)
+
+    def close(self):
+        """Unsubscribes the listeners of this provider and releases its
+        share of the pooled connection.
+        """
+        if self._source is None:
+            return
+        for cb in self._listeners:
+            self._source.unsubscribe(cb)
+        self._listeners = []
+        pool.release(self._source)
+        self._source = None
+
+
+class CircuitBreaker(object):
+    """Opens after `failure_threshold` consecutive failures. While open,
+    a single trial call is allowed every `reset_timeout` seconds; its
+    success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class Replica(object):
+    """A `RemoteProvider` along with its health and latency records."""
+
+    def __init__(self, provider, breaker, samples=100):
+        self.provider = provider
+        self.breaker = breaker
+        self.latencies = collections.deque(maxlen=samples)
+
+    def __str__(self):
+        return str(self.provider)
+
+    def percentile(self, p):
+        """Returns the `p`th percentile of the recorded fetch latencies,
+        or None if nothing was recorded yet.
+        """
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100.0))]
+
+    def fetch(self):
+        rp = self.provider
+        start = time.monotonic()
+        try:
+            data = rp.proxy.backend.get(rp.path)
+        except Exception:
+            self.breaker.failure()
+            raise
+        self.latencies.append(time.monotonic() - start)
+        self.breaker.success()
+        return data
+
+
+class ReplicatedProvider(BaseProvider):
+    """Several replicas of the same remote configuration.
+    Fetches go to the healthy replica with the lowest median latency. If it
+    did not answer within its `hedge_percentile` latency (`hedge_after`
+    seconds until enough samples were recorded), or failed, the next one is
+    tried as well and the first answer wins. Replicas failing
+    `failure_threshold` times in a row are skipped for `reset_timeout`
+    seconds.
+    """
+
+    def __init__(
+        self,
+        endpoints,
+        path,
+        v,
+        hedge_percentile=95,
+        hedge_after=0.05,
+        failure_threshold=3,
+        reset_timeout=30.0,
+    ):
+        super(ReplicatedProvider, self).__init__(path, v)
+
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.replicas = [
+            Replica(
+                RemoteProvider(provider, client, path, v),
+                CircuitBreaker(failure_threshold, reset_timeout),
+            )
+            for provider, client in endpoints
+        ]
+        if not self.replicas:
+            raise errors.RemoteConfigError("No replicas given for {0}".format(path))
+
+        self._config = None
+        self._listeners = []
+        for replica in self.replicas:
+            replica.provider.add_listener(self._on_change)
+
+    def close(self):
+        for replica in self.replicas:
+            replica.provider.close()
+
+    def __str__(self):
+        return "{0}:{1}".format(
+            ",".join(r.provider.provider for r in self.replicas), self._path
+        )
+
+    def _candidates(self):
+        def median(replica):
+            latency = replica.percentile(50)
+            return latency if latency is not None else 0.0
+
+        return [r for r in sorted(self.replicas, key=median) if r.breaker.allow()]
+
+    def _hedge_delay(self, replica):
+        if len(replica.latencies) < 10:
+            return self.hedge_after
+        return replica.percentile(self.hedge_percentile)
+
+    def _fetch(self):
+        candidates = self._candidates()
+        if not candidates:
+            raise errors.RemoteConfigError("all replicas are unavailable")
+
+        executor = _get_executor("hedge")
+        pending = {}
+        failures = []
+        timed_out = False
+        while True:
+            if candidates and (not pending or timed_out):
+                replica = candidates.pop(0)
+                pending[executor.submit(replica.fetch)] = replica
+                delay = self._hedge_delay(replica)
+
+            done, _ = concurrent.futures.wait(
+                pending,
+                timeout=delay if candidates else None,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            timed_out = not done
+            for future in done:
+                replica = pending.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    log.warning("Replica {0} failed: {1}".format(replica, e))
+                    failures.append("{0}: {1}".format(replica, e))
+                    continue
+                self._config = RemoteConfig(data)
+                return self._config
+
+            if not pending and not candidates:
+                raise errors.RemoteConfigError(", ".join(failures))
+
+    def _on_change(self, data):
+        config = self._config
+        if config is None or config == data:
+            return
+        config._invalidate(data)
+        for cb in list(self._listeners):
+            cb(data)
+
+    def add_listener(self, cb=None):
+        self._listeners.append(cb if cb is not None else self._update_kvstore)
+
+
+class MemoryStore(object):
+    """In-process key/value store to be used as the client of the
+    "memory" remote provider. Values are raw (unparsed) configurations.
+    """
+
+    def __init__(self, data=None):
+        self._data = dict(data or {})
+        self._backends = []
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        return self._data.get(path)
+
+    def put(self, path, value):
+        """Stores `value` at `path` and notifies every watching backend."""
+        with self._lock:
+            self._data[path] = value
+            backends = list(self._backends)
+        for backend in backends:
+            backend._on_path_change(path, value)
+
+    def delete(self, path):
+        with self._lock:
+            self._data.pop(path, None)
+            backends = list(self._backends)
+        for backend in backends:
+            backend._on_path_change(path, None)
+
+    def _subscribe(self, backend):
+        with self._lock:
+            self._backends.append(backend)
+
+
+class MemoryBackend(BaseBackend):
+    """distconfig backend reading from a `MemoryStore`.
+    Listeners are notified synchronously from `MemoryStore.put`.
+    """
+
+    def __init__(self, client, **kwargs):
+        super(MemoryBackend, self).__init__(**kwargs)
+        self._client = client
+        self._watching = set()
+        self._client._subscribe(self)
+
+    def get_raw(self, path):
+        self._watching.add(path)
+        return self._client.get(path)
+
+    def _on_path_change(self, path, value):
+        if path in self._watching:
+            self._notify_listeners(value)
+
+
+class FileStore(object):
+    """Local directory or HTTP(S) base URL to be used as the client of the
+    "file" remote provider. Paths are resolved relative to `root` and
+    polled every `interval` seconds once watched.
+    """
+
+    def __init__(self, root, interval=1.0):
+        self.root = str(root)
+        self.interval = interval
+
+    def _is_http(self):
+        return self.root.startswith(("http://", "https://"))
+
+    def read(self, path):
+        if self._is_http():
+            url = "{0}/{1}".format(self.root.rstrip("/"), path.lstrip("/"))
+            try:
+                with urllib.request.urlopen(url) as r:
+                    return r.read().decode("utf-8")
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    return None
+                raise
+
+        full_path = os.path.join(self.root, path.lstrip("/"))
+        try:
+            with open(full_path) as fp:
+                return fp.read()
+        except FileNotFoundError:
+            return None
+
+
+class FileBackend(BaseBackend):
+    """distconfig backend reading from a `FileStore`.
+    Every path read is polled for changes in the background.
+    """
+
+    def __init__(self, client, execution_context=ThreadingExecutionContext(), **kwargs):
+        super(FileBackend, self).__init__(**kwargs)
+        self._client = client
+        self._execution_context = execution_context
+        self._watching = set()
+
+    def get_raw(self, path):
+        result = self._client.read(path)
+        self._add_watcher(path, result)
+        return result
+
+    def _add_watcher(self, path, current):
+        if path not in self._watching:
+            self._watching.add(path)
+            self._execution_context.run(self._watch_for_changes, path, current)
+
+    def _watch_for_changes(self, path, current):
+        while 1:
+            time.sleep(self._client.interval)
+            try:
+                data = self._client.read(path)
+            except Exception as ex:
+                self._logger.error(
+                    "exception raised while polling {0}: {1}".format(path, ex)
+                )
+                continue
+            if data != current:
+                current = data
+                try:
+                    self._notify_listeners(data)
+                except Exception:
+                    pass  # already logged by `_notify_listeners`
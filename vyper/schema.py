@@ -0,0 +1,101 @@
+import collections
+
+from . import errors, unmarshal
+
+# Options of a key's schema.
+OPTIONS = ("type", "required", "min", "max", "choices")
+
+# A key's compiled schema: the getter kind and converter of its type,
+# as in `Vyper._get_coerced`, and its constraints.
+Rule = collections.namedtuple(
+    "Rule", ["key", "kind", "convert", "required", "min", "max", "choices"]
+)
+
+
+def compile(schema):
+    """Compiles schema, a `dict` of keys to either a type or a `dict` of
+    OPTIONS, into a list of rules.
+    """
+    rules = []
+    for key, spec in schema.items():
+        if not isinstance(spec, dict):
+            spec = {"type": spec}
+        unknown = set(spec) - set(OPTIONS)
+        if unknown:
+            raise ValueError(
+                "Unknown schema options for {0}: {1}".format(
+                    key, ", ".join(sorted(unknown))
+                )
+            )
+
+        kind, convert = None, None
+        if spec.get("type") is not None:
+            kind, convert = unmarshal.converter(spec["type"])
+            if convert is None:
+                raise ValueError(
+                    "Unsupported schema type for {0}: {1}".format(key, spec["type"])
+                )
+
+        choices = spec.get("choices")
+        rules.append(
+            Rule(
+                key,
+                kind,
+                convert,
+                spec.get("required", False),
+                spec.get("min"),
+                spec.get("max"),
+                tuple(choices) if choices is not None else None,
+            )
+        )
+    return rules
+
+
+def _size(val):
+    """Lengths are compared to min and max for strings and lists."""
+    if isinstance(val, (str, bytes, list)):
+        return len(val)
+    return val
+
+
+def validate(v, rules):
+    """Checks the configuration resolved by v against rules. Returns the
+    converted values, as (key, kind, raw value, converted value) tuples,
+    or raises `ValidationError` listing every problem found.
+    """
+    problems = []
+    coerced = []
+    for rule in rules:
+        raw = v.get(rule.key)
+        if raw is None:
+            if rule.required:
+                problems.append("{0} is required".format(rule.key))
+            continue
+
+        val = raw
+        if rule.convert is not None:
+            try:
+                val = rule.convert(raw)
+            except (TypeError, ValueError) as e:
+                problems.append("{0}: {1}".format(rule.key, e))
+                continue
+            coerced.append((rule.key, rule.kind, raw, val))
+
+        if rule.choices is not None and val not in rule.choices:
+            problems.append(
+                "{0}: {1!r} is not one of {2}".format(
+                    rule.key, val, ", ".join(sorted(map(repr, rule.choices)))
+                )
+            )
+        if rule.min is not None and _size(val) < rule.min:
+            problems.append(
+                "{0}: {1!r} is less than {2!r}".format(rule.key, val, rule.min)
+            )
+        if rule.max is not None and _size(val) > rule.max:
+            problems.append(
+                "{0}: {1!r} is greater than {2!r}".format(rule.key, val, rule.max)
+            )
+
+    if problems:
+        raise errors.ValidationError("; ".join(problems))
+    return coerced
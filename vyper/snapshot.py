@@ -0,0 +1,294 @@
+import collections.abc
+import datetime
+import marshal
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+
+from . import errors
+
+MAGIC = b"VYPS"
+LAYERS_MAGIC = b"VYPL"
+VERSION = 1
+
+# magic, version, flags, generation, entry count, delimiter length
+_HEADER = struct.Struct("<4sHHQIH")
+# magic, version, encoding
+_LAYERS_HEADER = struct.Struct("<4sHc")
+# key offset, key length, value offset, value length
+_ENTRY = struct.Struct("<IIII")
+
+_GENERATION = struct.Struct("<Q")
+
+_DICT = b"D"
+_MARSHAL = b"M"
+_PICKLE = b"P"
+
+
+def _portable(val):
+    """Replaces third-party tzinfo, such as TOML's, which can't always be
+    unpickled, by the equivalent fixed offset.
+    """
+    if isinstance(val, (datetime.datetime, datetime.time)) and val.tzinfo:
+        offset = val.utcoffset()
+        if offset is not None:
+            return val.replace(tzinfo=datetime.timezone(offset))
+    elif isinstance(val, list):
+        return [_portable(v) for v in val]
+    elif isinstance(val, dict):
+        return {k: _portable(v) for k, v in val.items()}
+    return val
+
+
+def _encode(val):
+    try:
+        return _MARSHAL + marshal.dumps(val)
+    except ValueError:  # e.g. datetimes from TOML
+        return _PICKLE + pickle.dumps(_portable(val), pickle.HIGHEST_PROTOCOL)
+
+
+def _flatten(d, prefix, delimiter, entries):
+    names = []
+    for k, v in d.items():
+        names.append(k)
+        path = k.lower() if prefix is None else prefix + delimiter + k.lower()
+        if isinstance(v, collections.abc.Mapping):
+            _flatten(v, path, delimiter, entries)
+        else:
+            entries[path] = _encode(v)
+    entries["" if prefix is None else prefix] = _DICT + marshal.dumps(names)
+
+
+def dumps(settings, delimiter=".", generation=0):
+    """Serializes nested `settings` into the snapshot format: a sorted
+    index of every lowercased key path, interior ones included, followed
+    by the encoded values.
+    """
+    entries = {}
+    _flatten(settings, None, delimiter, entries)
+    delim = delimiter.encode("utf-8")
+
+    keys = sorted((k.encode("utf-8"), v) for k, v in entries.items())
+    offset = _HEADER.size + len(delim) + _ENTRY.size * len(keys)
+    index = []
+    data = []
+    for key, val in keys:
+        index.append(_ENTRY.pack(offset, len(key), offset + len(key), len(val)))
+        data.append(key)
+        data.append(val)
+        offset += len(key) + len(val)
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, generation, len(keys), len(delim))
+    return b"".join([header, delim] + index + data)
+
+
+def write(settings, path, delimiter=".", generation=0):
+    """Atomically writes a snapshot of `settings` to `path`.
+    Readers following the generation counter only pick it up once the
+    counter is set to `generation`.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".vyper-snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(dumps(settings, delimiter, generation))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def dump_layers(layers, path):
+    """Atomically writes the `layers` dict, as used by
+    `Vyper.dump_snapshot`, to `path` in a compact binary form.
+    """
+    try:
+        encoding, data = _MARSHAL, marshal.dumps(layers)
+    except ValueError:  # e.g. datetimes from TOML
+        data = pickle.dumps(_portable(layers), pickle.HIGHEST_PROTOCOL)
+        encoding = _PICKLE
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".vyper-snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(_LAYERS_HEADER.pack(LAYERS_MAGIC, VERSION, encoding))
+            fp.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_layers(path):
+    """Reads back the layers written by `dump_layers`."""
+    with open(path, "rb") as fp:
+        data = fp.read()
+
+    if len(data) < _LAYERS_HEADER.size:
+        raise errors.SnapshotError(path)
+    magic, version, encoding = _LAYERS_HEADER.unpack_from(data)
+    if magic != LAYERS_MAGIC or version != VERSION:
+        raise errors.SnapshotError(path)
+
+    data = data[_LAYERS_HEADER.size :]
+    if encoding == _MARSHAL:
+        return marshal.loads(data)
+    return pickle.loads(data)
+
+
+class Generation(object):
+    """Generation counter of a published snapshot, kept in a small file
+    next to it and mapped in memory, so reading it costs no system call.
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        mode = "r+b" if writable else "rb"
+        if writable and not os.path.exists(path):
+            with open(path, "wb") as fp:
+                fp.write(_GENERATION.pack(0))
+        with open(path, mode) as fp:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._mm = mmap.mmap(fp.fileno(), _GENERATION.size, access=access)
+
+    @property
+    def value(self):
+        return _GENERATION.unpack_from(self._mm)[0]
+
+    def set(self, value):
+        _GENERATION.pack_into(self._mm, 0, value)
+
+
+def generation_path(path):
+    return path + ".gen"
+
+
+class SnapshotReader(object):
+    """Read-only view over a published snapshot.
+    If the publisher maintains a generation counter, the current file is
+    mapped again as soon as the counter moves, on the next lookup.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._segment = Segment(path)
+        self._generation = None
+        if os.path.exists(generation_path(path)):
+            self._generation = Generation(generation_path(path))
+
+    @property
+    def generation(self):
+        return self._segment.generation
+
+    def _refresh(self):
+        if self._generation is None:
+            return self._segment
+        generation = self._generation.value
+        segment = self._segment
+        if generation != segment.generation:
+            segment = self._segment = Segment(self.path)
+        return segment
+
+    def get(self, key):
+        """Returns the value at the lowercased, delimited `key`, or None."""
+        return self._refresh().get(key)
+
+    def keys(self):
+        """Returns the top-level keys."""
+        return self.get("").keys()
+
+
+class Segment(object):
+    """A snapshot file mapped in memory.
+    Values are decoded on lookup; nested dicts are returned as
+    `SnapshotMapping` views, so pages stay shared between the processes
+    mapping the same file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fp:
+            try:
+                self._mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise errors.SnapshotError(path)
+
+        if len(self._mm) < _HEADER.size:
+            raise errors.SnapshotError(path)
+        magic, version, _, generation, count, delim_len = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            raise errors.SnapshotError(path)
+
+        self.generation = generation
+        self._count = count
+        self._index = _HEADER.size + delim_len
+        self.delimiter = self._mm[_HEADER.size : self._index].decode("utf-8")
+
+    def _entry(self, key):
+        """Binary searches the index for `key`, returns the offset and
+        length of its value or None.
+        """
+        mm = self._mm
+        key = key.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k_off, k_len, v_off, v_len = _ENTRY.unpack_from(
+                mm, self._index + mid * _ENTRY.size
+            )
+            k = mm[k_off : k_off + k_len]
+            if k < key:
+                lo = mid + 1
+            elif k > key:
+                hi = mid
+            else:
+                return v_off, v_len
+        return None
+
+    def _decode(self, key, entry):
+        v_off, v_len = entry
+        tag = self._mm[v_off : v_off + 1]
+        data = self._mm[v_off + 1 : v_off + v_len]
+        if tag == _DICT:
+            return SnapshotMapping(self, key, marshal.loads(data))
+        elif tag == _MARSHAL:
+            return marshal.loads(data)
+        return pickle.loads(data)
+
+    def get(self, key):
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        return self._decode(key, entry)
+
+
+class SnapshotMapping(collections.abc.Mapping):
+    """Read-only mapping over a nested dict of a snapshot `Segment`."""
+
+    def __init__(self, segment, path, names):
+        self._segment = segment
+        self._path = path
+        self._names = names
+
+    def __repr__(self):
+        return "SnapshotMapping({0!r})".format(dict(self))
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, key):
+        return key in self._names
+
+    def __getitem__(self, key):
+        if key not in self._names:
+            raise KeyError(key)
+        path = key.lower()
+        if self._path:
+            path = self._path + self._segment.delimiter + path
+        return self._segment.get(path)
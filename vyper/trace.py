@@ -0,0 +1,35 @@
+class Trace(object):
+    """Record of the resolution of a key, as returned by `Vyper.explain`
+    and passed to `Vyper.trace` callbacks.
+    lookups lists the (layer, key) probed, in order; env lookups are keyed
+    by env. variable name. source is the layer the value was found in, or
+    None if the key is not set. elapsed is in seconds.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.value = None
+        self.source = None
+        self.lookups = []
+        self.elapsed = 0.0
+
+    @property
+    def probes(self):
+        """Number of lookups made."""
+        return len(self.lookups)
+
+    @property
+    def getenv_calls(self):
+        """Number of env. variables read."""
+        return sum(1 for layer, _ in self.lookups if layer == "env")
+
+    def __repr__(self):
+        return "Trace({0!r}, value={1!r}, source={2!r}, probes={3})".format(
+            self.key, self.value, self.source, self.probes
+        )
+
+    def probe(self, layer, key):
+        self.lookups.append((layer, key))
+
+    def hit(self, layer):
+        self.source = layer
@@ -0,0 +1,146 @@
+import collections
+import dataclasses
+import datetime
+import enum
+import typing
+import weakref
+
+from . import errors, util
+
+# Getter kind and converter by field type, as used by `Vyper._get_coerced`.
+CONVERTERS = {
+    str: ("string", str),
+    int: ("int", int),
+    float: ("float", float),
+    bool: ("bool", util.to_bool),
+    bytes: ("bytes", util.to_bytes),
+    list: ("list", util.to_list),
+    datetime.timedelta: ("duration", util.parse_duration),
+}
+
+# How to fill in a field: the key it's read from, relative to the prefix,
+# its converter, its default and, for nested dataclasses, their class and
+# plan.
+Step = collections.namedtuple(
+    "Step", ["name", "key", "kind", "convert", "default", "factory", "plan"]
+)
+
+_plans = weakref.WeakKeyDictionary()
+
+
+def _optional(tp):
+    """Returns X for Optional[X], tp otherwise."""
+    if typing.get_origin(tp) is typing.Union:
+        args = [a for a in typing.get_args(tp) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return tp
+
+
+def _list_of(convert):
+    def to_list(val):
+        if isinstance(val, str):
+            return [convert(v) for v in util.to_string_list(val)]
+        return [convert(v) for v in util.to_list(val)]
+
+    return to_list
+
+
+def _instance_of(cls):
+    def convert(val):
+        return val if isinstance(val, cls) else cls(val)
+
+    return convert
+
+
+def converter(tp):
+    """Returns the getter kind and converter of values of type tp, or
+    (None, None) to use values as they are.
+    """
+    if tp in CONVERTERS:
+        return CONVERTERS[tp]
+
+    origin = typing.get_origin(tp)
+    if origin in (list, typing.List):
+        args = typing.get_args(tp)
+        if args and args[0] is str:
+            return "string_list", util.to_string_list
+        if args and args[0] in CONVERTERS:
+            return ("list", args[0]), _list_of(CONVERTERS[args[0]][1])
+        return CONVERTERS[list]
+
+    if origin is None and isinstance(tp, type) and tp is not object:
+        if issubclass(tp, enum.Enum) or tp.__module__ != "builtins":
+            return tp, _instance_of(tp)
+    return None, None
+
+
+def compile(cls):
+    """Returns the plan to build instances of the dataclass cls, compiled
+    on first use.
+    """
+    plan = _plans.get(cls)
+    if plan is None:
+        plan = _plans[cls] = _compile(cls)
+    return plan
+
+
+def _compile(cls):
+    if not (dataclasses.is_dataclass(cls) and isinstance(cls, type)):
+        raise errors.UnmarshalError("{0}: not a dataclass".format(cls))
+
+    hints = typing.get_type_hints(cls)
+    plan = []
+    for f in dataclasses.fields(cls):
+        if not f.init:
+            continue
+
+        tp = _optional(hints.get(f.name, typing.Any))
+        key = f.metadata.get("vyper", f.name)
+        default = f.default
+        factory = f.default_factory
+        if dataclasses.is_dataclass(tp) and isinstance(tp, type):
+            nested = (tp, compile(tp))
+            plan.append(Step(f.name, key, None, None, default, factory, nested))
+        else:
+            kind, convert = converter(tp)
+            plan.append(Step(f.name, key, kind, convert, default, factory, None))
+    return plan
+
+
+def build(v, cls, plan, prefix=""):
+    """Builds an instance of cls from the values of v under prefix."""
+    values = {}
+    for step in plan:
+        key = prefix + step.key
+        if step.plan is not None:
+            if v.get(key) is None and (
+                step.default is not dataclasses.MISSING
+                or step.factory is not dataclasses.MISSING
+            ):
+                continue
+            nested_cls, nested_plan = step.plan
+            values[step.name] = build(
+                v, nested_cls, nested_plan, key + v._key_delimiter
+            )
+            continue
+
+        if step.convert is None:
+            val = v.get(key)
+        else:
+            try:
+                val = v._get_coerced(key, step.kind, step.convert, None)
+            except (TypeError, ValueError) as e:
+                raise errors.UnmarshalError(
+                    "{0}.{1}: {2}: {3}".format(cls.__name__, step.name, key, e)
+                )
+
+        if val is not None:
+            values[step.name] = val
+        elif (
+            step.default is dataclasses.MISSING and step.factory is dataclasses.MISSING
+        ):
+            raise errors.UnmarshalError(
+                "{0}.{1}: {2} is not set".format(cls.__name__, step.name, key)
+            )
+    return cls(**values)
@@ -1,10 +1,15 @@
+import collections.abc
+import datetime
 import logging
 import os
 import pathlib
+import re
 
 import toml
 import yaml
 
+from . import pmap
+
 try:
     import ujson as json
 except ImportError:
@@ -17,6 +22,24 @@ except NameError:
 
 log = logging.getLogger("vyper.util")
 
+# Seconds per duration unit, as in Go's time.ParseDuration.
+DURATION_UNITS = {
+    "ns": 1e-9,
+    "us": 1e-6,
+    "µs": 1e-6,
+    "ms": 1e-3,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+}
+
+_DURATION = re.compile(r"(\d+(?:\.\d*)?|\.\d+)(ns|us|µs|ms|s|m|h)")
+
+# Bytes per size unit prefix.
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+_SIZE = re.compile(r"(\d+(?:\.\d*)?|\.\d+)\s*([kmgt]?)(?:i?b)?", re.IGNORECASE)
+
 
 class ConfigParserError(Exception):
     """Denotes failing to parse configuration file."""
@@ -47,6 +70,159 @@ def exists(path):
         return False
 
 
+def flatten_dict(d, delimiter=".", prefix=""):
+    """Returns a `dict` of the leaves of the nested `d`, keyed by their
+    `delimiter` separated paths.
+    """
+    flat = {}
+    for k, v in d.items():
+        path = "{0}{1}{2}".format(prefix, delimiter, k) if prefix else str(k)
+        if isinstance(v, collections.abc.Mapping) and v:
+            flat.update(flatten_dict(v, delimiter, path))
+        else:
+            flat[path] = v
+    return flat
+
+
+def assoc(d, key, value):
+    """Returns a copy of `d` with `key` set to `value`."""
+    if isinstance(d, pmap.PMap):
+        return d.set(key, value)
+    new = dict(d)
+    new[key] = value
+    return new
+
+
+def dissoc(d, key):
+    """Returns a copy of `d` without `key`."""
+    if isinstance(d, pmap.PMap):
+        return d.delete(key)
+    new = dict(d)
+    new.pop(key, None)
+    return new
+
+
+def assoc_in(d, path, value):
+    """Returns a copy of the nested `d` with the value at the list of keys
+    `path` set to `value`. Only the dicts along `path` are copied, the
+    others are shared with `d`.
+    """
+    if len(path) == 1:
+        return assoc(d, path[0], value)
+    return assoc(d, path[0], assoc_in(d.get(path[0], {}), path[1:], value))
+
+
+def _leaves(d, prefix, delimiter, paths):
+    for k, v in d.items():
+        path = prefix + delimiter + k.lower()
+        paths.add(path)
+        if isinstance(v, collections.abc.Mapping):
+            _leaves(v, path, delimiter, paths)
+
+
+def diff(a, b, delimiter=".", prefix=""):
+    """Returns the set of lowercased, `delimiter` separated paths whose
+    values differ between the nested a and b, including every path under
+    a sub tree replaced by a value or the reverse. Identical sub trees are
+    skipped without being compared, so diffing a copy-on-write update
+    costs about the size of the change.
+    """
+    changed = set()
+    if a is b:
+        return changed
+
+    missing = object()
+    for k in set(a) | set(b):
+        va = a.get(k, missing)
+        vb = b.get(k, missing)
+        if va is vb:
+            continue
+        path = prefix + delimiter + k.lower() if prefix else k.lower()
+        a_map = isinstance(va, collections.abc.Mapping)
+        b_map = isinstance(vb, collections.abc.Mapping)
+        if a_map and b_map:
+            changed |= diff(va, vb, delimiter, path)
+        elif a_map or b_map or va != vb:
+            changed.add(path)
+            for side in (va, vb):
+                if isinstance(side, collections.abc.Mapping):
+                    _leaves(side, path, delimiter, changed)
+    return changed
+
+
+def to_bool(val):
+    if isinstance(val, str):
+        if val.lower() == "false":
+            return False
+    return bool(val)
+
+
+def to_bytes(val):
+    if isinstance(val, bytes):
+        return val
+    return str(val).encode("utf-8")
+
+
+def to_list(val):
+    if isinstance(val, list):
+        return val
+    if isinstance(val, (tuple, set, frozenset)):
+        return list(val)
+    return [val]
+
+
+def to_string_list(val, sep=","):
+    """Splits strings on sep, e.g. for env. variables, dropping blanks."""
+    if isinstance(val, str):
+        return [s.strip() for s in val.split(sep) if s.strip()]
+    return [str(v) for v in to_list(val)]
+
+
+def parse_duration(val):
+    """Parses a duration such as "300ms", "1.5h" or "2h45m" into a
+    `datetime.timedelta`, with the units of Go's time.ParseDuration.
+    Numbers, and strings without unit, are seconds.
+    """
+    if isinstance(val, datetime.timedelta):
+        return val
+    if isinstance(val, (int, float)) and not isinstance(val, bool):
+        return datetime.timedelta(seconds=val)
+
+    s = str(val).strip()
+    sign = -1 if s.startswith("-") else 1
+    s = s.lstrip("+-")
+    try:
+        return datetime.timedelta(seconds=sign * float(s))
+    except ValueError:
+        pass
+
+    seconds, pos = 0.0, 0
+    while pos < len(s):
+        m = _DURATION.match(s, pos)
+        if m is None:
+            raise ValueError("Invalid duration: {0!r}".format(val))
+        seconds += float(m.group(1)) * DURATION_UNITS[m.group(2)]
+        pos = m.end()
+    if pos == 0:
+        raise ValueError("Invalid duration: {0!r}".format(val))
+    return datetime.timedelta(seconds=sign * seconds)
+
+
+def parse_size(val):
+    """Parses a size such as "64MB", "512k" or "1.5GiB" into a number of
+    bytes. Units are powers of 1024 and numbers are bytes.
+    """
+    if isinstance(val, int) and not isinstance(val, bool):
+        return val
+    if isinstance(val, float):
+        return int(val)
+
+    m = _SIZE.fullmatch(str(val).strip())
+    if m is None:
+        raise ValueError("Invalid size: {0!r}".format(val))
+    return int(float(m.group(1)) * SIZE_UNITS[m.group(2).lower()])
+
+
 def unmarshall_config_reader(r, d, config_type):
     config_type = config_type.lower()
 
@@ -1,12 +1,60 @@
 import argparse
+import asyncio
+import contextlib
+import contextvars
+import datetime
 import logging
 import os
 import pprint
-
-from . import constants, errors, remote, util, watch
+import threading
+import time
+
+from . import (
+    constants,
+    errors,
+    index,
+    interpolate,
+    metrics,
+    pmap,
+    remote,
+    schema,
+    snapshot,
+    trace,
+    unmarshal,
+    util,
+    watch,
+)
 
 log = logging.getLogger("vyper")
 
+# State saved by `Vyper.dump_snapshot`.
+_SNAPSHOT_ATTRS = (
+    "_key_delimiter",
+    "_config_type",
+    "_env_prefix",
+    "_automatic_env_applied",
+    "_env_key_replacer",
+    "_aliases",
+    "_override",
+    "_args",
+    "_env",
+    "_config",
+    "_kvstore",
+    "_defaults",
+)
+
+# Nested layers whose changes are tracked key by key, see `_layers_changed`.
+_DATA_LAYERS = ("_override", "_args", "_config", "_kvstore", "_defaults")
+
+# Attempts at a lock-free consistent read before taking the writer lock.
+_READ_RETRIES = 3
+
+# Views pinned in the current context by `Vyper.pin`, by instance id.
+_pins = contextvars.ContextVar("vyper_pins", default=None)
+
+# Types of the nested values searched through with delimited keys.
+_MAPPINGS = (dict, pmap.PMap, snapshot.SnapshotMapping)
+
 
 class Vyper(object):
     """Vyper is a prioritized configuration registry. It maintains a set of
@@ -18,7 +66,8 @@ class Vyper(object):
         3. env. variables
         4. config file
         5. key/value store
-        6. defaults
+        6. snapshot
+        7. defaults
 
     For example, if values from the following sources were loaded:
 
@@ -43,6 +92,10 @@ class Vyper(object):
             "user": "root",
             "endpoint": "https://localhost"
         }
+
+    Vyper is safe to use from several threads: the layers are never
+    modified in place, changes publish new ones under a writer lock,
+    and reads don't lock.
     """
 
     def __init__(self, config_name="config", key_delimiter="."):
@@ -73,14 +126,209 @@ class Vyper(object):
         self._kvstore = {}
         self._defaults = {}
 
+        # Writers hold the lock while replacing layers, see `_swap`.
+        # The sequence number is odd while a swap is under way.
+        self._lock = threading.RLock()
+        self._seq = 0
+        # Number of contexts where this instance is pinned, see `pin`.
+        self._pin_count = 0
+
+        # Resolved configuration shared through a snapshot file.
+        self._snapshot = None
+        self._generation = None
+
         self._on_config_change = None
         self._on_remote_config_change = None
+        self._change_listeners = []
+        self._tracer = None
+        self._traced = False
+        # Converted values of the typed getters, see `_get_coerced`.
+        self._coerced = {}
+        # Rules checked on every load, see `set_schema`.
+        self._schema = None
+        # Interpolated values, see `enable_interpolation`.
+        self._interpolation = None
+        # Paths set in the data layers, see `is_set` and `keys_with_prefix`.
+        self._key_index = index.KeyIndex(key_delimiter)
+        # Whether the data layers are stored as `PMap`s, see
+        # `enable_persistent_layers`.
+        self._persistent = False
+        self._metrics = metrics.Metrics()
 
         self.parse_argv_disabled = False
 
+    @property
+    def version(self):
+        """Number of changes made to the configuration so far.
+        It only increases, so comparing two versions tells whether the
+        configuration changed in between.
+        """
+        return self._seq // 2
+
+    def _swap(self, **layers):
+        """Replaces the given layers (attributes) by reference and bumps
+        the version. Layers are never modified in place, so that readers
+        don't need to lock: writers build new ones, holding the lock when
+        they are derived from the current ones.
+        """
+        with self._lock:
+            old = {name: getattr(self, name) for name in layers}
+            if self._persistent:
+                for name in layers:
+                    if name in _DATA_LAYERS:
+                        layers[name] = pmap.evolve(old[name], layers[name])
+            self._seq += 1
+            for name, layer in layers.items():
+                setattr(self, name, layer)
+            self._layers_changed(old)
+            self._seq += 1
+
+    def _layers_changed(self, old):
+        """Updates the state derived from the layers replaced by `_swap`,
+        old holding their previous values.
+        """
+        for name, layer in old.items():
+            if name in _DATA_LAYERS:
+                self._key_index.update(layer, getattr(self, name))
+
+        memo = self._interpolation
+        if memo is not None and "_interpolation" not in old:
+            if any(name not in _DATA_LAYERS for name in old):
+                self._interpolation = interpolate.Memo()
+            else:
+                changed = set()
+                for name, layer in old.items():
+                    changed |= util.diff(
+                        layer, getattr(self, name), self._key_delimiter
+                    )
+                self._interpolation = memo.invalidate(changed, self._key_delimiter)
+
+    def enable_persistent_layers(self):
+        """Stores the overrides, args, config, key/value store and defaults
+        as persistent maps (`vyper.pmap.PMap`) rather than `dict`s. Each
+        change or reload then shares the values which didn't change with
+        the previous version, so that the versions kept by `pin` or by the
+        history cost memory in proportion to what changed.
+        Nested values are returned as read-only `PMap`s.
+        """
+        with self._lock:
+            if not self._persistent:
+                self._persistent = True
+                self._swap(**{name: getattr(self, name) for name in _DATA_LAYERS})
+
+    def _publish(self, **layers):
+        """Same as `_swap`, for layers loaded from a config source: the
+        configuration they result in is first checked against the schema,
+        raising `ValidationError` and keeping the current layers if it
+        doesn't match.
+        """
+        with self._lock:
+            rules = self._schema
+            if rules is None and self._interpolation is None:
+                self._swap(**layers)
+                return
+
+            candidate = self._view()
+            candidate.__dict__.update(layers)
+            candidate._traced = False
+            if self._interpolation is not None:
+                candidate._interpolation = None
+                interpolate.check_cycles(candidate._all_settings(), self._key_delimiter)
+                candidate._interpolation = interpolate.Memo()
+            coerced = schema.validate(candidate, rules) if rules is not None else []
+            self._swap(**layers)
+
+            # seed the typed getters with the values converted meanwhile
+            for key, kind, raw, val in coerced:
+                cache = self._coerced.get(kind)
+                if cache is None:
+                    cache = self._coerced[kind] = {}
+                cache[key] = (raw, val)
+
+    def set_schema(self, schema_):
+        """Sets the schema the configuration is checked against whenever it's
+        loaded: by `read_in_config`, `read_config`, `merge_config`, and the
+        remote config reads and updates. A configuration which doesn't match
+        is rejected with `ValidationError`, keeping the current one.
+        schema_ is a `dict` of keys to a type, or to a `dict` of:
+            type: the type values must convert to, as with the typed getters,
+                e.g. int, bool, or datetime.timedelta for durations
+            required: whether the key must be set, False by default
+            min, max: bounds of the value, or of the length of strings and
+                lists
+            choices: the allowed values
+
+        e.g. {"port": {"type": int, "min": 1, "max": 65535}, "debug": bool}
+        The converted values are cached for the typed getters.
+        """
+        self._schema = schema.compile(schema_) if schema_ is not None else None
+
+    def validate(self):
+        """Checks the current configuration against the schema, raising
+        `ValidationError` if it doesn't match.
+        """
+        if self._schema is not None:
+            schema.validate(self, self._schema)
+
+    def _read_consistent(self, func, *args):
+        """Calls func, retrying if the configuration changed meanwhile, so
+        that the values it reads all come from the same version.
+        """
+        for _ in range(_READ_RETRIES):
+            seq = self._seq
+            if not seq & 1:
+                val = func(*args)
+                if self._seq == seq:
+                    return val
+        with self._lock:
+            return func(*args)
+
+    @contextlib.contextmanager
+    def pin(self):
+        """Fixes the current version of the configuration in this thread
+        or asyncio task: until the block exits, `get` and the other getters
+        ignore changes, e.g. so that a web request reads consistent values
+        throughout. Yields the pinned view, which can also be read directly.
+        Pinning doesn't copy the configuration, it shares the layers with
+        the live instance.
+        """
+        view = self._pinned() or self._read_consistent(self._view)
+        pins = dict(_pins.get() or {})
+        pins[id(self)] = view
+        token = _pins.set(pins)
+        with self._lock:
+            self._pin_count += 1
+        try:
+            yield view
+        finally:
+            with self._lock:
+                self._pin_count -= 1
+            _pins.reset(token)
+
+    def _view(self):
+        """Returns an instance sharing the current layers of this one."""
+        view = object.__new__(self.__class__)
+        view.__dict__.update(self.__dict__)
+        view._pin_count = 0
+        # the index follows the live layers
+        view._key_index = None
+        return view
+
+    def _pinned(self):
+        """Returns the view pinned in the current context, if any."""
+        pins = _pins.get()
+        if pins is not None:
+            return pins.get(id(self))
+        return None
+
     def on_config_change(self, func, *args, **kwargs):
         self._on_config_change = lambda: func(*args, **kwargs)
 
+    def _notify_change(self, source, path):
+        change = watch.ConfigChange(source, path)
+        for listener in list(self._change_listeners):
+            listener(change)
+
     def watch_config(self):
         config_file = self._get_config_file()
         watcher = watch.get_watcher(config_file, self)
@@ -97,20 +345,22 @@ class Vyper(object):
         e.g. if your prefix is "spf", the env registry will look
         for env. variables that start with "SPF_"
         """
-        self._env_prefix = prefix
+        self._swap(_env_prefix=prefix)
 
     def _merge_with_env_prefix(self, key):
         if self._env_prefix != "":
             return ("{0}_{1}".format(self._env_prefix, key)).upper()
         return key.upper()
 
-    def _get_env(self, key):
+    def _get_env(self, key, trace=None):
         """Wrapper around os.getenv() which replaces characters
         in the original key. This allows env vars which have different keys
         than the config object keys.
         """
         if self._env_key_replacer is not None:
             key = key.replace(*self._env_key_replacer)
+        if trace is not None:
+            trace.probe("env", key)
         return os.getenv(key)
 
     def config_file_used(self):
@@ -126,39 +376,64 @@ class Vyper(object):
             log.info("Adding {0} to paths to search".format(abspath))
             self._config_paths.append(abspath)
 
-    def add_remote_provider(self, provider, client, path):
+    def add_remote_provider(self, provider, client, path, prefetch=True):
         """Adds a remote configuration source.
         Remote Providers are searched in the order they are added.
-        provider is a string value, "etcd", "consul" and "zookeeper" are
-        currently supported.
+        provider is a string value, "etcd", "consul", "zookeeper", "memory"
+        and "file" are currently supported. More can be added with
+        `vyper.remote.register_provider`.
         client is a client object
         path is the path in the k/v store to retrieve configuration
         To retrieve a config file called myapp.json from /configs/myapp.json
         you should set path to /configs and set config name (set_config_name)
         to "myapp"
+        The configuration is fetched in the background when prefetch is
+        True, otherwise on the first `read_remote_config`. Either way, fetch
+        errors are raised by `read_remote_config`.
         """
-        if provider not in constants.SUPPORTED_REMOTE_PROVIDERS:
+        if provider not in remote.PROVIDER_TYPE:
             raise errors.UnsupportedRemoteProviderError(provider)
 
-        host = ""
-        if provider == "etcd":
-            host = "{0}://{1}:{2}".format(client.protocol, client.host, client.port)
-        elif provider == "consul":
-            host = "{0}://{1}:{2}".format(
-                client.http.scheme, client.http.host, client.http.port
-            )
-        elif provider == "zookeeper":
-            host = ",".join(str("{0}:{1}".format(h[0], h[1])) for h in client.hosts)
-
+        host = remote.provider_host(provider, client)
         log.info("Adding {0}:{1} to remote provider list".format(provider, host))
 
-        rp = remote.RemoteProvider(provider, client, path, self)
-        if not self._provider_path_exists(rp):
+        if not self._provider_path_exists(path):
+            rp = remote.RemoteProvider(provider, client, path, self)
             self._remote_providers.append(rp)
+            if prefetch:
+                rp.prefetch()
+
+    def add_remote_replicas(self, path, endpoints, prefetch=True, **options):
+        """Adds a remote configuration source served by several replicas,
+        e.g. the members of a cluster or a regional and a global store.
+        endpoints is a list of (provider, client) tuples.
+        Reads are hedged across replicas and routed around failing ones,
+        see `vyper.remote.ReplicatedProvider` for the available options.
+        """
+        for provider, client in endpoints:
+            if provider not in remote.PROVIDER_TYPE:
+                raise errors.UnsupportedRemoteProviderError(provider)
 
-    def _provider_path_exists(self, rp):
+            host = remote.provider_host(provider, client)
+            log.info("Adding {0}:{1} to {2} replicas".format(provider, host, path))
+
+        if not self._provider_path_exists(path):
+            rp = remote.ReplicatedProvider(endpoints, path, self, **options)
+            self._remote_providers.append(rp)
+            if prefetch:
+                rp.prefetch()
+
+    def remove_remote_providers(self):
+        """Removes all the remote providers, releasing their share of the
+        connections pooled with other Vyper instances.
+        """
+        providers, self._remote_providers = self._remote_providers, []
+        for rp in providers:
+            rp.close()
+
+    def _provider_path_exists(self, path):
         for p in self._remote_providers:
-            if p.path == rp.path:
+            if p.path == path:
                 return True
         return False
 
@@ -167,7 +442,7 @@ class Vyper(object):
             return d
         for key in keys:
             val = self._find_insensitive(key, d)
-            if val is not None and not isinstance(val, dict):
+            if val is not None and not isinstance(val, _MAPPINGS):
                 return val
             elif val:
                 return self._search_dict(val, keys[1::])
@@ -181,14 +456,61 @@ class Vyper(object):
         place from where it is set. Viper will check in the following order:
         override, arg, env, config file, key/value store, default.
         """
+        if self._pin_count:
+            view = self._pinned()
+            if view is not None:
+                return view.get(key)
+        if self._traced:
+            t = self.explain(key)
+            if self._metrics.lookups:
+                self._metrics.lookup(t.source)
+            if self._tracer is not None:
+                self._tracer(t)
+            val = t.value
+        else:
+            val = self._get(key)
+        if self._interpolation is not None and val is not None:
+            return self._interpolate(key, val)
+        return val
+
+    def enable_interpolation(self):
+        """Resolves references to other keys, as "${key}", and to env.
+        variables, as "${env:VAR}", in the values returned by `get` and
+        the getters. Referenced keys are looked up with `get`, so in all
+        the layers, and a value made only of a reference keeps the type of
+        the referenced value. "$${" stands for a literal "${".
+        Interpolated values are memoized, and dropped only when a key they
+        depend on changes. Loads introducing a cycle between references
+        are rejected with `InterpolationError`.
+        """
+        with self._lock:
+            if self._interpolation is None:
+                interpolate.check_cycles(self._all_settings(), self._key_delimiter)
+                self._swap(_interpolation=interpolate.Memo())
+
+    def _interpolate(self, key, raw):
+        memo = self._interpolation
+        key = self._real_key(key.lower())
+        entry = memo.get(key, raw)
+        if entry is None:
+            seq = self._seq
+            if interpolate.has_refs(raw):
+                entry = interpolate.resolve(self, key, raw)
+            else:
+                entry = interpolate.Entry(raw, raw, frozenset(), {})
+            if seq == self._seq and not seq & 1:
+                memo.put(key, entry)
+        return entry.value
+
+    def _get(self, key, trace=None):
         path = key.split(self._key_delimiter)
 
         lowercase_key = key.lower()
-        val = self._find(lowercase_key)
+        val = self._find(lowercase_key, trace)
 
         if val is None:
-            source = self._find(path[0].lower())
-            if source is not None and isinstance(source, dict):
+            source = self._find(path[0].lower(), trace)
+            if source is not None and isinstance(source, _MAPPINGS):
                 val = self._search_dict(source, path[1::])
 
         if val is None:
@@ -196,37 +518,135 @@ class Vyper(object):
 
         return val
 
-    def get_string(self, key):
+    def get_many(self, keys):
+        """Returns a `dict` of the values of keys, all read from the same
+        version of the configuration, even when it is being changed
+        concurrently.
+        """
+        if self._pin_count:
+            view = self._pinned()
+            if view is not None:
+                return view._get_many(keys)
+        return self._read_consistent(self._get_many, keys)
+
+    def _get_many(self, keys):
+        return {key: self.get(key) for key in keys}
+
+    def explain(self, key):
+        """Returns a `Trace` of how `get` resolves key: the value, the
+        layer it comes from, every lookup made, in order, and the time it
+        took.
+        """
+        t = trace.Trace(key)
+        start = time.perf_counter()
+        t.value = self._get(key, t)
+        t.elapsed = time.perf_counter() - start
+        if t.value is None:
+            t.source = None
+        return t
+
+    def trace(self, callback):
+        """Calls callback with the `Trace` of every `get` from now on, or
+        stops tracing if callback is None. When tracing is disabled, `get`
+        records nothing.
+        """
+        self._tracer = callback
+        self._traced = self._tracer is not None or self._metrics.lookups
+
+    def enable_lookup_stats(self, enabled=True):
+        """Counts, in `stats`, the layer each `get` finds its value in.
+        This traces every `get`, making it slower.
+        """
+        self._metrics.lookups = enabled
+        self._traced = self._tracer is not None or self._metrics.lookups
+
+    def stats(self):
+        """Returns the metrics of this instance as a `dict`: lookups per
+        layer (see `enable_lookup_stats`), value cache hits, reloads per
+        source, and histograms of the parse durations, remote fetch
+        durations and file watcher lag. See `vyper.metrics.prometheus_text`
+        to export them.
+        """
+        return self._metrics.as_dict()
+
+    def _get_coerced(self, key, kind, convert, default, *args):
+        """Returns the value of key converted by convert, or default if
+        it isn't set. Converted values are cached by key and kind, and
+        reused for as long as the value they were converted from is the
+        same.
+        """
         val = self.get(key)
-        return str(val) if val is not None else ""
+        if val is None:
+            return default
+
+        cache = self._coerced.get(kind)
+        if cache is None:
+            cache = self._coerced[kind] = {}
+        entry = cache.get(key)
+        if entry is not None:
+            raw = entry[0]
+            if raw is val or (type(raw) is type(val) and raw == val):
+                self._metrics.cache_hits += 1
+                return entry[1]
+
+        self._metrics.cache_misses += 1
+        coerced = convert(val, *args)
+        cache[key] = (val, coerced)
+        return coerced
+
+    def get_string(self, key):
+        return self._get_coerced(key, "string", str, "")
 
     def get_bool(self, key):
-        val = self.get(key)
-        if isinstance(val, str):
-            if val.lower() == "false":
-                return False
-        return bool(val)
+        return self._get_coerced(key, "bool", util.to_bool, False)
 
     def get_int(self, key):
-        val = self.get(key)
-        return int(val) if val is not None else 0
+        return self._get_coerced(key, "int", int, 0)
 
     def get_float(self, key):
-        val = self.get(key)
-        return float(val) if val is not None else 0.0
+        return self._get_coerced(key, "float", float, 0.0)
 
     def get_bytes(self, key):
-        return b"{0}".format(self.get(key))
+        return self._get_coerced(key, "bytes", util.to_bytes, b"")
+
+    def get_list(self, key):
+        """Returns the value of key as a list, a single value being a list
+        of one. The same list is returned until the value changes, it must
+        not be modified.
+        """
+        return self._get_coerced(key, "list", util.to_list, [])
+
+    def get_string_list(self, key, sep=","):
+        """Returns the value of key as a list of strings, splitting strings
+        such as env. variables on sep, e.g. "a,b,c". The same list is
+        returned until the value changes, it must not be modified.
+        """
+        return self._get_coerced(
+            key, ("string_list", sep), util.to_string_list, [], sep
+        )
+
+    def get_duration(self, key):
+        """Returns the value of key as a `datetime.timedelta`, parsing
+        strings such as "30s" or "1h30m", see `util.parse_duration`.
+        """
+        return self._get_coerced(
+            key, "duration", util.parse_duration, datetime.timedelta(0)
+        )
+
+    def get_size(self, key):
+        """Returns the value of key as a number of bytes, parsing strings
+        such as "64MB" (1024-based), see `util.parse_size`.
+        """
+        return self._get_coerced(key, "size", util.parse_size, 0)
 
     def sub(self, key):
-        """Returns new Vyper instance representing a sub tree of this instance."""
-        subv = Vyper()
-        data = self.get(key)
-        if isinstance(data, dict):
-            subv._config = data
-            return subv
-        else:
-            return None
+        """Returns a `SubView` of the sub tree of this instance at key, or
+        None if key isn't a sub tree. The view copies nothing and follows
+        the changes made to this instance.
+        """
+        if isinstance(self.get(key), _MAPPINGS):
+            return SubView(self, key)
+        return None
 
     def unmarshall_key(self, key, cls):
         """Takes a single key and unmarshalls it into a class."""
@@ -241,6 +661,21 @@ class Vyper(object):
 
         return cls
 
+    def unmarshal(self, cls, key=None):
+        """Returns an instance of the dataclass cls built from the config,
+        or from the sub tree at key. Each field is read from the key of the
+        same name, or the one in its "vyper" metadata, and converted to its
+        type like the typed getters do, e.g. `int` like `get_int` and
+        `datetime.timedelta` like `get_duration`. Nested dataclasses are
+        read from the sub tree of their field. Unset fields keep their
+        default; unset fields without one raise `UnmarshalError`.
+        The plan to build cls is compiled on first use, and the values
+        all come from the same version of the config.
+        """
+        plan = unmarshal.compile(cls)
+        prefix = key + self._key_delimiter if key else ""
+        return self._read_consistent(unmarshal.build, self, cls, plan, prefix)
+
     def bind_args(self, parser):
         if isinstance(parser, argparse.ArgumentParser):
             return self._bind_parser_values(parser)
@@ -279,7 +714,8 @@ class Vyper(object):
         if arg is None:
             raise ValueError("arg for {0} is None".format(key))
 
-        self._args[key.lower()] = arg
+        with self._lock:
+            self._swap(_args=util.assoc(self._args, key.lower(), arg))
 
     def bind_env(self, *input_):
         """Binds a Vyper key to a ENV variable.
@@ -298,16 +734,19 @@ class Vyper(object):
         else:
             env_key = input_[1]
 
-        self._env[key] = env_key
+        with self._lock:
+            env = util.assoc(self._env, key, env_key)
 
-        if self._key_delimiter in key:
-            parts = input_[0].split(self._key_delimiter)
-            env_info = {"path": parts[1:-1], "final_key": parts[-1], "env_key": env_key}
+            if self._key_delimiter in key:
+                parts = input_[0].split(self._key_delimiter)
+                env_info = {
+                    "path": parts[1:-1],
+                    "final_key": parts[-1],
+                    "env_key": env_key,
+                }
+                env[parts[0]] = (env.get(parts[0]) or []) + [env_info]
 
-            if self._env.get(parts[0]) is None:
-                self._env[parts[0]] = [env_info]
-            else:
-                self._env[parts[0]].append(env_info)
+            self._swap(_env=env)
 
         return None
 
@@ -320,34 +759,36 @@ class Vyper(object):
         real_key = self._find_real_key(key, source)
         return source.get(real_key)
 
-    def _set_insensitive(self, key, val, source):
-        if source:
-            real_key = self._find_real_key(key, source)
-            if real_key is None:
-                msg = "No case insensitive variant of {0} found.".format(key)
-                raise KeyError(msg)
-
-            source[real_key] = val
-            return True
-
-    def _find(self, key):
+    def _find(self, key, trace=None):
         """Given a key, find the value
         Vyper will check in the following order:
         override, arg, env, config file, key/value store, default
         Vyper will check to see if an alias exists first.
+        Lookups are recorded to trace, if given.
         """
         key = self._real_key(key)
+        debug = log.isEnabledFor(logging.DEBUG)
 
         # OVERRIDES
+        if trace is not None:
+            trace.probe("override", key)
         val = self._override.get(key)
         if val is not None:
-            log.debug("{0} found in override: {1}".format(key, val))
+            if debug:
+                log.debug("{0} found in override: {1}".format(key, val))
+            if trace is not None:
+                trace.hit("override")
             return val
 
         # ARGS
+        if trace is not None:
+            trace.probe("args", key)
         val = self._args.get(key)
         if val is not None:
-            log.debug("{0} found in args: {1}".format(key, val))
+            if debug:
+                log.debug("{0} found in args: {1}".format(key, val))
+            if trace is not None:
+                trace.hit("args")
             return val
 
         # ENVIRONMENT VARIABLES
@@ -356,80 +797,137 @@ class Vyper(object):
             # check any `get` request
 
             # Find "as-is"
-            val = self._get_env(self._merge_with_env_prefix(key))
+            val = self._get_env(self._merge_with_env_prefix(key), trace)
             # Find nested
             if val is None and "." in key:
-                val = self._get_env(self._merge_with_env_prefix(key.replace(".", "_")))
+                val = self._get_env(
+                    self._merge_with_env_prefix(key.replace(".", "_")), trace
+                )
 
             if val is not None:
-                log.debug("{0} found in environment: {1}".format(key, val))
+                if debug:
+                    log.debug("{0} found in environment: {1}".format(key, val))
+                if trace is not None:
+                    trace.hit("env")
                 return val
 
         env_key = self._find_insensitive(key, self._env)
-        log.debug("Looking for {0} in env".format(key))
+        if debug:
+            log.debug("Looking for {0} in env".format(key))
         if isinstance(env_key, list):
             parent = self._find_insensitive(key, self._config)
             found_in_env = False
-            log.debug("Found env key parent {0}: {1}".format(key, parent))
+            if debug:
+                log.debug("Found env key parent {0}: {1}".format(key, parent))
 
             for item in env_key:
-                log.debug(
-                    "{0} registered as env var parent {1}:".format(key, item["env_key"])
-                )
-                val = self._get_env(item["env_key"])
-
-                if val is not None:
+                if debug:
                     log.debug(
-                        "{0} found in environment: {1}".format(item["env_key"], val)
+                        "{0} registered as env var parent {1}:".format(
+                            key, item["env_key"]
+                        )
                     )
+                val = self._get_env(item["env_key"], trace)
+
+                if val is not None:
+                    if debug:
+                        log.debug(
+                            "{0} found in environment: {1}".format(item["env_key"], val)
+                        )
+                    # copy the parent rather than setting the value in the
+                    # config, which may be read concurrently
                     temp = parent
+                    real_path = []
                     for path in item["path"]:
                         real_key = self._find_real_key(path, temp)
+                        real_path.append(real_key)
                         temp = temp[real_key]
 
-                    if self._set_insensitive(item["final_key"], val, temp):
+                    if temp:
+                        real_path.append(self._find_real_key(item["final_key"], temp))
+                        if real_path[-1] is None:
+                            msg = "No case insensitive variant of {0} found.".format(
+                                item["final_key"]
+                            )
+                            raise KeyError(msg)
+                        parent = util.assoc_in(parent, real_path, val)
                         found_in_env = True
                 else:
-                    log.debug("{0} env value unset".format(item["env_key"]))
+                    if debug:
+                        log.debug("{0} env value unset".format(item["env_key"]))
 
             if found_in_env:
+                if trace is not None:
+                    trace.hit("env")
                 return parent
 
         elif env_key is not None:
-            log.debug("{0} registered as env var: {1}".format(key, env_key))
-            val = self._get_env(env_key)
+            if debug:
+                log.debug("{0} registered as env var: {1}".format(key, env_key))
+            val = self._get_env(env_key, trace)
             if val is not None:
-                log.debug("{0} found in environment: {1}".format(env_key, val))
+                if debug:
+                    log.debug("{0} found in environment: {1}".format(env_key, val))
+                if trace is not None:
+                    trace.hit("env")
                 return val
             else:
-                log.debug("{0} env value unset".format(env_key))
+                if debug:
+                    log.debug("{0} env value unset".format(env_key))
 
         # CONFIG FILE
+        if trace is not None:
+            trace.probe("config", key)
         val = self._find_insensitive(key, self._config)
         if val is not None:
-            log.debug("{0} found in config: {1}".format(key, val))
+            if debug:
+                log.debug("{0} found in config: {1}".format(key, val))
+            if trace is not None:
+                trace.hit("config")
             return val
 
         # Test for nested config parameter
         if self._key_delimiter in key:
             path = key.split(self._key_delimiter)
 
-            source = self._find(path[0])
-            if source is not None and isinstance(source, dict):
+            source = self._find(path[0], trace)
+            if source is not None and isinstance(source, _MAPPINGS):
                 val = self._search_dict(source, path[1::])
                 if val is not None:
-                    log.debug("{0} found in nested config: {1}".format(key, val))
+                    if debug:
+                        log.debug("{0} found in nested config: {1}".format(key, val))
                     return val
 
         # KEY/VALUE STORE
+        if trace is not None:
+            trace.probe("kvstore", key)
         val = self._kvstore.get(key)
         if val is not None:
-            log.debug("{0} found in key/value store: {1}".format(key, val))
+            if debug:
+                log.debug("{0} found in key/value store: {1}".format(key, val))
+            if trace is not None:
+                trace.hit("kvstore")
             return val
 
+        # SNAPSHOT
+        if self._snapshot is not None:
+            if trace is not None:
+                trace.probe("snapshot", key)
+            val = self._snapshot.get(key)
+            if val is not None:
+                if debug:
+                    log.debug("{0} found in snapshot: {1}".format(key, val))
+                if trace is not None:
+                    trace.hit("snapshot")
+                return val
+
         # DEFAULTS
+        if trace is not None:
+            trace.probe("defaults", key)
         val = self._find_in_defaults(key)
         if val is not None:
+            if trace is not None:
+                trace.hit("defaults")
             return val
 
         return None
@@ -442,7 +940,7 @@ class Vyper(object):
         if self._key_delimiter in key:
             path = key.split(self._key_delimiter)
             source = self._find_in_defaults(path[0])
-            if source is not None and isinstance(source, dict):
+            if source is not None and isinstance(source, _MAPPINGS):
                 val = self._search_dict(source, path[1::])
                 if val is not None:
                     return val
@@ -450,31 +948,56 @@ class Vyper(object):
         return None
 
     def is_set(self, key):
-        """Check to see if the key has been set in any of the data locations."""
-        path = key.split(self._key_delimiter)
-
-        lower_case_key = key.lower()
-        val = self._find(lower_case_key)
+        """Check to see if the key has been set in any of the data locations.
+        Keys set nowhere are answered from the index of the set paths,
+        without searching the layers.
+        """
+        return self._read_consistent(self._is_set, key)
 
-        if val is None:
-            source = self._find(path[0].lower())
-            if source is not None and isinstance(source, dict):
-                val = self._search_dict(source, path[1::])
+    def _is_set(self, key):
+        if self._key_index is not None and self._unset(key.lower()):
+            return False
+        return self._get(key) is not None
 
-        return val is not None
+    def _unset(self, key):
+        """Returns True if the lowercased key is known not to be set, from
+        the index, False if it may be.
+        """
+        if self._automatic_env_applied:
+            return False
+
+        # the paths `_find` looks up, through aliases
+        real_key = self._real_key(key)
+        paths = {real_key}
+        for k in (key, real_key):
+            path = k.split(self._key_delimiter)
+            path[0] = self._real_key(path[0])
+            paths.add(self._key_delimiter.join(path))
+
+        for path in paths:
+            if path in self._key_index:
+                return False
+            if self._snapshot is not None and self._snapshot.get(path) is not None:
+                return False
+            if self._env:
+                first = path.split(self._key_delimiter)[0]
+                for k in (path, first):
+                    if self._find_real_key(k, self._env) is not None:
+                        return False
+        return True
 
     def automatic_env(self):
         """Have Vyper check ENV variables for all keys set in
         config, default & args.
         """
-        self._automatic_env_applied = True
+        self._swap(_automatic_env_applied=True)
 
     def set_env_key_replacer(self, old, new):
         """Sets the strings.Replacer on the Vyper object.
         Useful for mapping an environment variable to a key that does
         not match it.
         """
-        self._env_key_replacer = old, new
+        self._swap(_env_key_replacer=(old, new))
 
     def register_alias(self, alias, key):
         """Aliases provide another accessor for the same key.
@@ -483,30 +1006,23 @@ class Vyper(object):
         alias = alias.lower()
         key = key.lower()
         if alias != key and alias != self._real_key(key):
-            exists = self._aliases.get(alias)
-
-            if exists is None:
-                # if we alias something that exists in one of the dicts to
-                # another name, we'll never be able to get that value using the
-                # original name, so move the config value to the new _real_key.
-                val = self._config.get(alias)
-                if val:
-                    self._config.pop(alias)
-                    self._config[key] = val
-                val = self._kvstore.get(alias)
-                if val:
-                    self._kvstore.pop(alias)
-                    self._kvstore[key] = val
-                val = self._defaults.get(alias)
-                if val:
-                    self._defaults.pop(alias)
-                    self._defaults[key] = val
-                val = self._override.get(alias)
-                if val:
-                    self._override.pop(alias)
-                    self._override[key] = val
-
-                self._aliases[alias] = key
+            with self._lock:
+                exists = self._aliases.get(alias)
+
+                if exists is None:
+                    layers = {"_aliases": util.assoc(self._aliases, alias, key)}
+                    # if we alias something that exists in one of the dicts to
+                    # another name, we'll never be able to get that value using
+                    # the original name, so move the value to the new _real_key.
+                    for name in ("_config", "_kvstore", "_defaults", "_override"):
+                        layer = getattr(self, name)
+                        val = layer.get(alias)
+                        if val:
+                            layers[name] = util.assoc(
+                                util.dissoc(layer, alias), key, val
+                            )
+
+                    self._swap(**layers)
         else:
             log.warning(
                 "Creating circular reference alias {0} {1} {2}".format(
@@ -534,16 +1050,18 @@ class Vyper(object):
         Default only used when no value is provided by the user via
         arg, config or env.
         """
-        k = self._real_key(key.lower())
-        self._defaults[k] = value
+        with self._lock:
+            k = self._real_key(key.lower())
+            self._swap(_defaults=util.assoc(self._defaults, k, value))
 
     def set(self, key, value):
         """Sets the value for the key in the override register.
         Will be used instead of values obtained via
         args, config file, env, defaults or key/value store.
         """
-        k = self._real_key(key.lower())
-        self._override[k] = value
+        with self._lock:
+            k = self._real_key(key.lower())
+            self._swap(_override=util.assoc(self._override, k, value))
 
     def read_in_config(self):
         """Vyper will discover and load the configuration file from disk
@@ -553,12 +1071,35 @@ class Vyper(object):
         if self._get_config_type() not in constants.SUPPORTED_EXTENSIONS:
             raise errors.UnsupportedConfigError(self._get_config_type())
 
-        with open(self._get_config_file()) as fp:
+        self._publish(_config=self._load_config_file(self._get_config_file()))
+        self._metrics.reloads["file"] += 1
+        return self._config
+
+    def _load_config_file(self, config_file):
+        start = time.perf_counter()
+        with open(config_file) as fp:
             f = fp.read()
 
-        self._config = {}
+        d = self._unmarshall_reader(f, {})
+        duration = time.perf_counter() - start
+        self._metrics.parse_duration["read_in_config"].observe(duration)
+        return d
+
+    async def aread_in_config(self):
+        """Same as `read_in_config`, reading and parsing the file in the
+        event loop's default executor.
+        """
+        log.info("Attempting to read in config file")
+        if self._get_config_type() not in constants.SUPPORTED_EXTENSIONS:
+            raise errors.UnsupportedConfigError(self._get_config_type())
 
-        return self._unmarshall_reader(f, self._config)
+        loop = asyncio.get_running_loop()
+        config = await loop.run_in_executor(
+            None, self._load_config_file, self._get_config_file()
+        )
+        self._publish(_config=config)
+        self._metrics.reloads["file"] += 1
+        return self._config
 
     def merge_in_config(self):
         log.info("Attempting to merge in config file")
@@ -574,23 +1115,31 @@ class Vyper(object):
         """Vyper will read a configuration file, setting existing keys to
         `None` if the key does not exist in the file.
         """
-        self._unmarshall_reader(f, self._config)
+        with self._lock:
+            self._publish(_config=self._unmarshall_reader(f, dict(self._config)))
 
     def merge_config(self, f):
-        if self._config is None:
-            self._config = {}
-
+        start = time.perf_counter()
         cfg = {}
         cfg = self._unmarshall_reader(f, cfg)
+        duration = time.perf_counter() - start
+        self._metrics.parse_duration["merge_config"].observe(duration)
 
-        self._merge_dicts(cfg, self._config)
+        with self._lock:
+            self._publish(_config=self._merge_dicts(cfg, self._config or {}))
+        self._metrics.reloads["merge"] += 1
 
     def _merge_dicts(self, src, target):
+        """Returns a copy of target merged with src. Only the dicts that
+        change are copied, the others are shared with target.
+        """
+        merged = dict(target)
         for k, v in src.items():
-            if isinstance(v, dict) and k in target:
-                self._merge_dicts(v, target[k])
+            if isinstance(v, _MAPPINGS) and isinstance(merged.get(k), _MAPPINGS):
+                merged[k] = self._merge_dicts(v, merged[k])
             else:
-                target[k] = v
+                merged[k] = v
+        return merged
 
     def read_remote_config(self):
         """Attempts to get configuration from a remote source
@@ -605,16 +1154,67 @@ class Vyper(object):
     def _get_key_value_config(self):
         """Retrieves the first found remote configuration."""
         for rp in self._remote_providers:
-            val = self._get_remote_config(rp)
-            self._kvstore = val
+            with self._lock:
+                self._publish(_kvstore=self._get_remote_config(rp))
+            self._metrics.reloads["remote"] += 1
             return None
 
         raise errors.RemoteConfigError("No Files Found")
 
     def _get_remote_config(self, provider):
         reader = provider.get()
-        self._unmarshall_reader(reader, self._kvstore)
-        return self._kvstore
+        return self._unmarshall_reader(reader, dict(self._kvstore))
+
+    async def aread_remote_config(self):
+        """Same as `read_remote_config`, fetching from all the remote
+        providers in parallel and using the first one, in the order they
+        were added, that succeeded.
+        """
+        if not self._remote_providers:
+            raise errors.RemoteConfigError("No Files Found")
+
+        loop = asyncio.get_running_loop()
+        await asyncio.wait(
+            [asyncio.wrap_future(rp.prefetch()) for rp in self._remote_providers]
+        )
+
+        error = None
+        for rp in self._remote_providers:
+            try:
+                reader = rp.get()
+            except errors.RemoteConfigError as e:
+                error = error or e
+                continue
+            kvstore = await loop.run_in_executor(
+                None, self._unmarshall_reader, reader, dict(self._kvstore)
+            )
+            self._publish(_kvstore=kvstore)
+            self._metrics.reloads["remote"] += 1
+            return None
+
+        raise error
+
+    async def changes(self):
+        """Asynchronous iterator over the changes picked up by the config
+        file watcher and the remote listeners, as `ConfigChange` tuples.
+        The watchers must be started separately, with `watch_config` and
+        `watch_remote_config`.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def listener(change):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, change)
+            except RuntimeError:  # loop closed
+                pass
+
+        self._change_listeners.append(listener)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._change_listeners.remove(listener)
 
     def on_remote_config_change(self, func, *args, **kwargs):
         self._on_remote_config_change = lambda x: func(*args, **kwargs)
@@ -629,8 +1229,15 @@ class Vyper(object):
             return None
         raise errors.RemoteConfigError("No Files Found")
 
-    def all_keys(self, uppercase_keys=False):
-        """Return all keys regardless where they are set."""
+    def all_keys(self, uppercase_keys=False, nested=False):
+        """Return all keys regardless where they are set.
+        With nested, the delimited paths of the nested values are returned
+        instead of the top-level keys, sorted, e.g. "clothing.jacket"
+        rather than "clothing".
+        """
+        if nested:
+            return self._nested_keys(uppercase_keys)
+
         d = {}
 
         for k in self._override.keys():
@@ -648,6 +1255,10 @@ class Vyper(object):
         for k in self._kvstore.keys():
             d[k.upper() if uppercase_keys else k.lower()] = {}
 
+        if self._snapshot is not None:
+            for k in self._snapshot.keys():
+                d[k.upper() if uppercase_keys else k.lower()] = {}
+
         for k in self._defaults.keys():
             d[k.upper() if uppercase_keys else k.lower()] = {}
 
@@ -656,8 +1267,48 @@ class Vyper(object):
 
         return d.keys()
 
+    def _nested_keys(self, uppercase_keys=False, prefix=""):
+        if self._key_index is not None:
+            keys = set(self._key_index.with_prefix(prefix))
+        else:
+            keys = set()
+            for name in _DATA_LAYERS:
+                flat = util.flatten_dict(getattr(self, name), self._key_delimiter)
+                keys.update(k.lower() for k, v in flat.items() if v is not None)
+
+        for k, v in self._env.items():
+            if not isinstance(v, list):
+                keys.add(k.lower())
+        keys.update(self._aliases)
+        if self._snapshot is not None:
+            root = self._snapshot.get("")
+            if root is not None:
+                keys.update(
+                    k.lower() for k in util.flatten_dict(root, self._key_delimiter)
+                )
+
+        return sorted(
+            k.upper() if uppercase_keys else k for k in keys if k.startswith(prefix)
+        )
+
+    def keys_with_prefix(self, prefix):
+        """Returns the sorted, delimited paths of the nested values whose
+        path starts with prefix, e.g. all the keys under "db." with
+        `keys_with_prefix("db.")`.
+        """
+        return self._nested_keys(prefix=prefix.lower())
+
     def all_settings(self, uppercase_keys=False):
-        """Return all settings as a `dict`."""
+        """Return all settings as a `dict`, all read from the same version of
+        the configuration.
+        """
+        if self._pin_count:
+            view = self._pinned()
+            if view is not None:
+                return view._all_settings(uppercase_keys)
+        return self._read_consistent(self._all_settings, uppercase_keys)
+
+    def _all_settings(self, uppercase_keys=False):
         d = {}
 
         for k in self.all_keys(uppercase_keys):
@@ -665,6 +1316,62 @@ class Vyper(object):
 
         return d
 
+    def publish_snapshot(self, path, follow=False):
+        """Writes the resolved configuration to a snapshot file at `path`,
+        for other processes to `attach_snapshot`, and bumps the generation
+        counter kept next to it.
+        When follow is True, the snapshot is published again on every
+        change picked up by `watch_config` or `watch_remote_config`, so
+        a single process watches and parses on behalf of all of them.
+        """
+        if self._generation is None or self._generation.path != (
+            snapshot.generation_path(path)
+        ):
+            self._generation = snapshot.Generation(
+                snapshot.generation_path(path), writable=True
+            )
+
+        generation = self._generation.value + 1
+        log.info("Publishing config snapshot {0} to {1}".format(generation, path))
+        snapshot.write(self.all_settings(), path, self._key_delimiter, generation)
+        self._generation.set(generation)
+
+        if follow:
+            self._change_listeners.append(lambda _: self.publish_snapshot(path))
+
+    def attach_snapshot(self, path):
+        """Reads values from the snapshot file at `path`, as published by
+        `publish_snapshot`. The file is mapped in memory and values are
+        decoded on lookup, so the pages are shared by all the processes
+        attached to it. The snapshot takes precedence over defaults only.
+        New generations published to `path` are picked up on the next
+        lookup.
+        """
+        log.info("Attaching config snapshot {0}".format(path))
+        self._swap(_snapshot=snapshot.SnapshotReader(path))
+
+    def dump_snapshot(self, path):
+        """Saves the configuration layers (overrides, args, env bindings,
+        config, key/value store, defaults and aliases) and the env settings
+        to `path`, in a binary form which loads much faster than parsing
+        the original config. See `load_snapshot`.
+        """
+        log.info("Dumping config layers to {0}".format(path))
+        layers = {a: pmap.thaw(getattr(self, a)) for a in _SNAPSHOT_ATTRS}
+        snapshot.dump_layers(layers, path)
+
+    @classmethod
+    def load_snapshot(cls, path):
+        """Returns a new Vyper instance with the layers saved by
+        `dump_snapshot` at `path`.
+        """
+        log.info("Loading config layers from {0}".format(path))
+        layers = snapshot.load_layers(path)
+
+        v = cls(key_delimiter=layers.get("_key_delimiter", "."))
+        v._swap(**{attr: layers[attr] for attr in _SNAPSHOT_ATTRS if attr in layers})
+        return v
+
     def set_config_name(self, name):
         """Name for the config file. Does not include extension."""
         self._config_name = name
@@ -744,3 +1451,69 @@ class Vyper(object):
         pprint.pprint(self._kvstore)
         print("Defaults:")
         pprint.pprint(self._defaults)
+        if self._snapshot is not None:
+            print("Snapshot:")
+            print(self._snapshot.path)
+
+
+def _delegate(name):
+    def method(self, key, *args, **kwargs):
+        return getattr(self._parent, name)(self._key(key), *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = "Same as `Vyper.{0}`, relative to the prefix.".format(name)
+    return method
+
+
+class SubView(object):
+    """View of the keys of a `Vyper` instance under a prefix, as returned
+    by `Vyper.sub`. `get("x")` resolves "prefix.x" with the parent, through
+    all its layers, so the view stays up to date after reloads.
+    """
+
+    def __init__(self, parent, prefix):
+        self._parent = parent
+        self._prefix = prefix
+        self._key_delimiter = parent._key_delimiter
+
+    def __repr__(self):
+        return "SubView({0!r})".format(self._prefix)
+
+    def _key(self, key):
+        return self._prefix + self._key_delimiter + key
+
+    get = _delegate("get")
+    get_string = _delegate("get_string")
+    get_bool = _delegate("get_bool")
+    get_int = _delegate("get_int")
+    get_float = _delegate("get_float")
+    get_bytes = _delegate("get_bytes")
+    get_list = _delegate("get_list")
+    get_string_list = _delegate("get_string_list")
+    get_duration = _delegate("get_duration")
+    get_size = _delegate("get_size")
+    is_set = _delegate("is_set")
+    sub = _delegate("sub")
+
+    def get_many(self, keys):
+        values = self._parent.get_many([self._key(key) for key in keys])
+        return {key: values[self._key(key)] for key in keys}
+
+    def all_keys(self):
+        """Returns the keys under the prefix, one level deep."""
+        d = {}
+        data = self._parent.get(self._prefix)
+        if isinstance(data, _MAPPINGS):
+            for k in data.keys():
+                d[k.lower()] = {}
+
+        start = self._key("").lower()
+        for k in self._parent.all_keys():
+            if k.startswith(start):
+                d[k[len(start) :].split(self._key_delimiter)[0]] = {}
+
+        return d.keys()
+
+    def all_settings(self):
+        """Returns the settings under the prefix as a `dict`."""
+        return self.get_many(self.all_keys())
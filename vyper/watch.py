@@ -1,3 +1,5 @@
+import collections
+import logging
 import os
 import threading
 import time
@@ -5,13 +7,24 @@ import time
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+from . import errors, util
+
+log = logging.getLogger("vyper.watch")
+
+
+ConfigChange = collections.namedtuple("ConfigChange", ["source", "path"])
+ConfigChange.__doc__ = """A configuration reload, from either the "file" watcher
+or a "remote" listener, of the config at `path`."""
+
 
 class CustomHandler(FileSystemEventHandler):
     current_event = None
+    event_time = None
 
     def process(self, event):
         if event.is_directory is not True:
             self.current_event = event
+            self.event_time = time.monotonic()
 
     def on_modified(self, event):
         self.process(event)
@@ -38,16 +51,30 @@ class BaseWatcher(object):
         observer.start()
         try:
             while True:
+                event_time = self.handler.event_time
                 event = self.event
                 if event is not None and event.src_path == self.config_file:
-                    self.v.read_in_config()
-                    if self.v._on_config_change is not None:
-                        self.v._on_config_change()
+                    self.reload(event_time)
                 time.sleep(1)
         except KeyboardInterrupt:
             observer.stop()
         observer.join()
 
+    def reload(self, event_time):
+        """Reads the config file in again, keeping the current config if
+        it can't be parsed, e.g. when it's only partly written, or doesn't
+        match the schema.
+        """
+        try:
+            self.v.read_in_config()
+        except (errors.ValidationError, util.ConfigParserError) as e:
+            log.error("Rejected config {0}: {1}".format(self.config_file, e))
+            return
+        self.v._metrics.watch_lag.observe(time.monotonic() - event_time)
+        self.v._notify_change("file", self.config_file)
+        if self.v._on_config_change is not None:
+            self.v._on_config_change()
+
     @property
     def event(self):
         return self.handler.get_event()